@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# file from https://github.com/Nircek/resistorer
+# licensed under MIT license
+
+'''
+MIT License
+
+Copyright (c) 2018-2019 Nircek
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+import glob
+import io
+import json
+import math
+import os
+import sys
+import time
+
+from sketch import open_sketch
+
+
+def find_files(paths):
+    '''Gets the sorted list of sketch files from paths which can be files,
+    directories (all .sk files in them) or glob patterns.'''
+    found = set()
+    for path in paths:
+        if os.path.isdir(path):
+            found.update(glob.glob(os.path.join(path, '*.sk')))
+        elif os.path.isfile(path):
+            found.add(path)
+        else:
+            found.update(glob.glob(path, recursive=True))
+    return sorted(found)
+
+
+def number(value):
+    '''Makes the value valid in JSON: infinities and NaN (e.g. R of an open
+    circuit) are given as strings 'inf', '-inf' and 'nan'.'''
+    if isinstance(value, float) and not math.isfinite(value):
+        return str(value)
+    return value
+
+
+def solve(file, engine='reduction', legacy=False):
+    '''Opens the sketch file (saved by BoardEditor.save) and calculates it
+    with the power supply saved in it. No BoardEditor is made, so there is
+    no tk window.
+    param legacy (bool) - if True: old pickled sketches are read too
+    Returns the dict with results which can be dumped to JSON.'''
+    result = {'file': file}
+    start = time.perf_counter()
+    try:
+        board, unit, power = open_sketch(file, legacy)
+        with redirect_stdout(io.StringIO()):  # calc prints the circuit
+            crc = board.calc(force=True, engine=engine)
+        board.nodes.calc_voltages(crc, unit, power)
+        r_eq = crc.ph_r
+        is_voltage = unit == 'V'
+        result.update({
+            'R': number(r_eq),
+            'U': number(power if is_voltage else power * r_eq),
+            'I': number(power if not is_voltage else (
+                power / r_eq if r_eq else float('inf'))),
+            'resistors': [{'uid': tel.uid, 'R': number(tel.ph_r),
+                           'U': number(tel.ph_u), 'I': number(tel.ph_i)}
+                          for tel in board.tels.values()
+                          if str(tel) == 'Resistor']})
+    except Exception as error:  # pylint: disable=W0703
+        result['error'] = f'{error.__class__.__name__}: {error}'
+    result['time'] = time.perf_counter() - start
+    return result
+
+
+def solve_all(files, engine='reduction', workers=None, legacy=False):
+    '''Yields results of solve for all files (in the same order), which are
+    calculated by workers processes (None: as many as CPUs).'''
+    if workers == 1:
+        for file in files:
+            yield solve(file, engine, legacy)
+        return
+    with ProcessPoolExecutor(workers) as executor:
+        yield from executor.map(solve, files, [engine] * len(files),
+                                [legacy] * len(files))
+
+
+def main(argv=None):
+    '''Solves sketch files given in argv and writes the results as JSON
+    lines (infinite values are written as strings, see number).'''
+    parser = argparse.ArgumentParser(
+        description='Calculates many sketch files without the editor.')
+    parser.add_argument('paths', nargs='+',
+                        help='.sk files, directories or glob patterns')
+    parser.add_argument('-e', '--engine', default='reduction',
+                        choices=('reduction', 'nodal'))
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='count of processes (default: count of CPUs)')
+    parser.add_argument('-o', '--output', default='-',
+                        help='the file for JSON lines (default: stdout)')
+    parser.add_argument('--legacy', action='store_true',
+                        help='read old pickled sketches too (only for '
+                        'trusted files)')
+    args = parser.parse_args(argv)
+    output = sys.stdout if args.output == '-' else \
+        open(args.output, mode='w', encoding='utf-8')
+    failed = False
+    for result in solve_all(find_files(args.paths), args.engine,
+                            args.workers, args.legacy):
+        failed = failed or 'error' in result
+        output.write(json.dumps(result, allow_nan=False) + '\n')
+        output.flush()
+    if output is not sys.stdout:
+        output.close()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
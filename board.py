@@ -27,67 +27,148 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 '''
 
-from elements import Resistor
+from elements import Resistor, Wire, APin, BPin
 from circuit_solver import Nodes
-from coordinates import Pos, ttoposa, ttoposb
+from nodal_analysis import NodalAnalysis
+from coordinates import tel_ends
+from storage import ElementStore, Tiles
 
 
 class NoPinsError(Exception):
     '''There are no pins specified and no calculation can be made.'''
 
 
+class NotKnownEngineError(Exception):
+    '''There is no such engine to calculate the circuit.'''
+
+
 class NothingHappenedError(Exception):
     '''Since the last calculation, input data hasn't changed
     so the calculations are the same as the last time.'''
 
 
 class Board:
-    '''The object containing all data about the board and Elements on it.'''
-    def __init__(self):
-        self.tels = {}  # elements with (x, y, p)
+    '''The object containing all data about the board and Elements on it.
+    If compact, TElements are kept in ElementStore instead of dict (it is
+    much smaller for big boards made mostly from Wires).'''
+    def __init__(self, compact=False):
+        # elements with (x, y, p)
+        self.tels = ElementStore() if compact else {}
         self.oels = {}  # elements with (x, y)
         self.nodes = Nodes()
-        self.last_calc = None, None
+        self.version = 0  # changed with every change of the structure
+        self.value_version = 0  # changed with every change of values
+        self.last_calc = None, None  # versions of the last calc
+        self.engine = 'reduction'  # or 'nodal'
+        self.last_crc, self.last_engine, self.analysis = None, None, None
+        self.changed = []  # (Resistor, old resistance) since the last calc
+        # (kind, pos) of Elements changed since BoardEditor drew them
+        self.touched = None  # None if nothing draws the board (see touch)
+        self.tiles = None  # Tiles with all Elements (see watch)
+
+    def __setstate__(self, state):
+        self.__init__()  # attributes pickled before they existed
+        self.__dict__.update(state)
+
+    def watch(self):
+        '''Starts remembering touched positions (see touch) and makes
+        self.tiles, the spatial index of all Elements kept up to date by
+        touch. BoardEditor uses them to draw only what it has to, so boards
+        without a window don't keep them.'''
+        self.touched = []
+        self.tiles = Tiles()
+        for pos in self.tels:
+            self.tiles.add('t', pos)
+        for pos in self.oels:
+            self.tiles.add('o', pos)
+
+    def touch(self, kind, pos):
+        '''Remembers that the Element at pos has changed (after the change),
+        so BoardEditor can redraw only it, and updates self.tiles. Nothing is
+        done if the board isn't watched (see watch).
+        param kind ('t', 'o' or None) - TElement, OElement or everything'''
+        if self.touched is None:
+            return
+        if kind is None:
+            self.watch()  # index everything again
+            self.touched = [(None, None)]
+            return
+        self.touched += [(kind, pos)]
+        if pos in (self.tels if kind == 't' else self.oels):
+            self.tiles.add(kind, pos)
+        else:
+            self.tiles.discard(kind, pos)
 
     def new_tel(self, element, pos):
         '''Adds new TElement.'''
         self.tels[pos] = element
+        self.version += 1
+        self.touch('t', pos)
 
     def new_oel(self, element, pos):
-        '''Adds new OElement.'''
+        '''Adds new OElement. The Pin of the same kind is deleted.'''
+        if str(element) in ('APin', 'BPin'):
+            for oel in [x for x, y in self.oels.items()
+                        if str(y) == str(element)]:
+                self.del_oel(oel)
         self.oels[pos] = element
+        self.version += 1
+        self.touch('o', pos)
+
+    def add_resistor(self, pos, value, uid=None, parent=None):
+        '''Adds new Resistor with the resistance value without asking about
+        it, so it works without BoardEditor. Returns the Resistor.
+        param pos (tuple) - (x, y, orient) like keys of self.tels
+        param parent - the BoardEditor displaying it (or None)'''
+        resistor = Resistor(parent, uid, value)
+        self.new_tel(resistor, pos)
+        return resistor
+
+    def add_wire(self, pos, parent=None):
+        '''Adds new Wire at pos (x, y, orient).'''
+        self.new_tel(Wire(parent), pos)
+
+    def add_pins(self, pos_a, pos_b, parent=None):
+        '''Sets the APin at pos_a (x, y) and the BPin at pos_b (x, y).
+        The Pin isn't changed if its pos is None.'''
+        if pos_a is not None:
+            self.new_oel(APin(parent), pos_a)
+        if pos_b is not None:
+            self.new_oel(BPin(parent), pos_b)
+
+    def move_tel(self, pos, new_pos):
+        '''Moves the TElement from pos to new_pos (replacing the TElement
+        there if present).'''
+        if pos in self.tels.keys() and pos != new_pos:
+            self.tels[new_pos] = self.tels.pop(pos)
+            self.version += 1
+            self.touch('t', pos)
+            self.touch('t', new_pos)
 
     def update_node(self):
         '''Updates self.nodes object with the current state.'''
         self.nodes.reset_nodes()
         for oel in self.oels:
             self.nodes.add_node(oel[0], oel[1])
-        for tel in self.tels:
-            if str(self.tels[tel]) == 'Wire':
-                pos_a = ttoposa(Pos(tel))
-                pos_b = ttoposb(Pos(tel))
-                self.nodes.add_node(pos_a.x_coord, pos_a.y_coord,
-                                    pos_b.x_coord, pos_b.y_coord)
+        for teli, tel in self.tels.items():
+            pos_a, pos_b = tel_ends(teli)
+            if str(tel) == 'Wire':
+                self.nodes.add_node(*pos_a, *pos_b)
             else:
-                pos_a = ttoposa(Pos(tel))
-                pos_b = ttoposb(Pos(tel))
-                self.nodes.add_node(pos_a.x_coord, pos_a.y_coord)
-                self.nodes.add_node(pos_b.x_coord, pos_b.y_coord)
+                self.nodes.add_node(*pos_a)
+                self.nodes.add_node(*pos_b)
 
     def calc_res(self):  # calc resistorers
         '''Exports all Resistors with simplified connections between them.
         Connections can be accessed by .node_a and .node_b properties.'''
         self.update_node()
         buffer = []
-        for tel in self.tels:
-            if str(self.tels[tel]) == 'Resistor':
-                pos_a = ttoposa(Pos(tel))
-                pos_b = ttoposb(Pos(tel))
-                pos_a = self.nodes.search_node(pos_a.x_coord, pos_a.y_coord)
-                pos_b = self.nodes.search_node(pos_b.x_coord, pos_b.y_coord)
-                self.tels[tel].node_a = pos_a
-                self.tels[tel].node_b = pos_b
-                buffer += [self.tels[tel]]
+        for teli, tel in self.tels.items():
+            if str(tel) == 'Resistor':
+                pos_a, pos_b = tel_ends(teli)
+                tel.node_a = self.nodes.search_node(*pos_a)
+                tel.node_b = self.nodes.search_node(*pos_b)
+                buffer += [tel]
         return buffer
 
     def calc_res_bis(self, data=None):
@@ -97,14 +178,31 @@ class Board:
             data = self.calc_res()
         return [(x.node_a, x, x.node_b) for x in data]
 
-    def calc(self, force=False):
-        '''Translates into the circuit (made from Primitives).'''
-        if self.last_calc == repr((self.tels, self.oels)) and not force:
-            raise NothingHappenedError
-        self.last_calc = repr((self.tels, self.oels))
-        self.calc_res()
+    def calc(self, force=False, engine=None):
+        '''Translates into the circuit (made from Primitives).
+        param engine ('reduction' or 'nodal') - the way of calculating
+                     if 'reduction': simplifies the circuit with Nodes
+                                     (circuits with the same topology are
+                                     simplified with the remembered plan)
+                     if 'nodal': solves it with NodalAnalysis
+                     if None: self.engine is used'''
+        if engine is None:
+            engine = self.engine
+        if engine not in ('reduction', 'nodal'):
+            raise NotKnownEngineError(engine)
+        if self.last_calc[0] == self.version and not force:
+            if self.last_calc[1] == self.value_version:
+                raise NothingHappenedError
+            self.last_calc = self.version, self.value_version
+            crc = self.recalc(engine)
+            if crc is not None:  # not printed, value edits must fit in a frame
+                return crc
+        self.last_calc = self.version, self.value_version
+        self.changed = []
+        self.last_crc = None  # it is invalid until this calc succeeds
+        crc = self.calc_res()
         start = end = -1
-        for tel in self.tels.values():
+        for tel in crc:  # only Resistors have ph_u
             tel.ph_u = None
         for oeli, oel in self.oels.items():
             if str(oel) == 'APin':
@@ -113,15 +211,65 @@ class Board:
                 end = self.nodes.search_node(oeli[0], oeli[1])
         if -1 in (start, end):
             raise NoPinsError
-        crc = self.calc_res()
-        crc = self.nodes.interpret(crc, start, end)
+        if engine == 'nodal':
+            self.analysis = NodalAnalysis(crc, start, end)
+            crc = self.analysis.solve()
+        else:
+            key, order, labels = self.nodes.fingerprint(
+                self.calc_res_bis(crc), start, end)
+            crc = self.nodes.interpret([crc[i] for i in order], start, end,
+                                       key, labels)
+        self.last_crc, self.last_engine = crc, engine
         print(repr(crc), crc.ph_r)
         return crc
 
+    def solve(self, unit='V', amount=1, engine=None):
+        '''Calculates the circuit (like calc, even if nothing changed) and
+        all voltage drops and currents for the power supply.
+        param unit ('A' or 'V') - the unit of power
+        param amount (int or float) - the value of power
+        Returns the circuit.'''
+        crc = self.calc(force=True, engine=engine)
+        self.nodes.calc_voltages(crc, unit, amount)
+        return crc
+
+    def set_resistance(self, resistor, value):
+        '''Changes the resistance of the Resistor. Only values are changed so
+        the next calc can reuse the last calculated circuit.'''
+        self.changed += [(resistor, resistor.ph_r)]
+        resistor.ph_r = value
+        self.value_version += 1
+
+    def recalc(self, engine):
+        '''Updates the last calculated circuit after changes made by
+        set_resistance. The reduced circuit reads resistances of Resistors
+        directly, so it is still valid, and the solution of NodalAnalysis
+        is updated by rank-one updates. Returns None if the whole circuit has
+        to be calculated again.'''
+        if engine != self.last_engine or self.last_crc is None:
+            return None
+        if engine == 'nodal':
+            for resistor, old_value in self.changed:
+                if not self.analysis.update(resistor, old_value):
+                    return None
+        self.changed = []
+        return self.last_crc
+
+    def tolerance(self):
+        '''Simplifies the circuit once and returns the Tolerance object which
+        can calculate it for many sets of resistances.'''
+        from tolerance import Tolerance  # pylint: disable=C0415
+        crc = self.calc(force=True, engine='reduction')
+        resistors = [tel for tel in self.tels.values()
+                     if str(tel) == 'Resistor']
+        return Tolerance(crc, resistors, self.nodes.eliminated)
+
     def new_sketch(self):
         '''Deletes all Elements.'''
-        self.tels = {}
+        self.tels.clear()
         self.oels = {}
+        self.version += 1
+        self.touch(None, None)
 
     def count(self):
         '''Recounts all indexes of all Resistors.'''
@@ -130,13 +278,18 @@ class Board:
             if str(tel) == 'Resistor':
                 tel.uid = Resistor.resistor_i
                 Resistor.resistor_i += 1
+        self.touch(None, None)  # uids are shown
 
     def del_tel(self, pos):
         '''Deletes the TElement.'''
         if pos in self.tels.keys():
             del self.tels[pos]
+            self.version += 1
+            self.touch('t', pos)
 
     def del_oel(self, pos):
         '''Deletes the OElement.'''
         if pos in self.oels.keys():
             del self.oels[pos]
+            self.version += 1
+            self.touch('o', pos)
@@ -30,15 +30,14 @@ SOFTWARE.
 
 import math
 import code
-from tkinter import simpledialog, messagebox, filedialog
-import tkinter as tk
+import io
 import sys
-import pickle
 
 from elements import APin, BPin, Wire, Resistor, TElement, OElement
 from coordinates import Pos, pround
 from board import Board, NothingHappenedError, NoPinsError
 from primitives import Primitive, get_unit
+import sketch
 
 
 class CanceledError(Exception):
@@ -48,6 +47,7 @@ class CanceledError(Exception):
 class BoardEditor:  # pylint: disable=R0902
     '''The editor of the Board, it has a tk window and a Board.'''
     def __init__(self, WIDTH=1280, HEIGHT=720, s=40):
+        import tkinter as tk  # pylint: disable=C0415
         self.size = Pos(WIDTH, HEIGHT)
         self.elsize = s  # size of one element
         self.board = Board()
@@ -63,7 +63,6 @@ class BoardEditor:  # pylint: disable=R0902
         self.in_motion = Pos(-1, -1)
         self.shift = Pos(0, 0)
         self.newpos = Pos(0, 0)
-        self.newself = False
         self.x_coord = 0
         self.y_coord = 0
         self.lastfile = None
@@ -72,6 +71,9 @@ class BoardEditor:  # pylint: disable=R0902
         self.power = 12
         self.crc = Primitive(math.inf)  # CiRCuit :D easy to remember
         # but is it necessary?
+        self.view = None  # (x, y, elsize, width, height) of the canvas items
+        self.info_key = None  # what the info was written for
+        self.shown = set()  # (kind, pos) of Elements with canvas items
 
     def set_power(self, is_voltage, value):
         '''Sets the value of voltage or current for calculations between APin
@@ -93,6 +95,7 @@ class BoardEditor:  # pylint: disable=R0902
 
     def make_tk(self):
         '''Sets all the tk stuff.'''
+        import tkinter as tk  # pylint: disable=C0415
         self.tkroot.title('Resistorer')
         self.canvas.bind('<Button 1>', self.on_click1)
         self.canvas.bind('<ButtonRelease-1>', self.on_rel1)
@@ -103,7 +106,8 @@ class BoardEditor:  # pylint: disable=R0902
         # -----
         menu_bar = tk.Menu(self.tkroot)
         file_menu = tk.Menu(menu_bar, tearoff=0)
-        file_menu.add_command(label='New', command=self.board.new_sketch,
+        file_menu.add_command(label='New',
+                              command=lambda: self.board.new_sketch(),
                               accelerator='Shift+Del')
         file_menu.add_command(label='Open', command=self.open,
                               accelerator='Ctrl+O')
@@ -137,7 +141,7 @@ class BoardEditor:  # pylint: disable=R0902
                 lambda p: self.delete(p[0], p[1])),
             accelerator='Del')
         edit_menu.add_command(label='Delete all',
-                              command=self.board.new_sketch,
+                              command=lambda: self.board.new_sketch(),
                               accelerator='Shift+Del')
         menu_bar.add_cascade(label='Edit', menu=edit_menu)
         # -----
@@ -147,7 +151,8 @@ class BoardEditor:  # pylint: disable=R0902
         view_menu.add_command(label='Zoom out',
                               command=lambda: self.zoom(-1), accelerator='-')
         view_menu.add_command(label='Count resistors',
-                              command=self.board.count, accelerator='\'')
+                              command=lambda: self.board.count(),
+                              accelerator='\'')
         menu_bar.add_cascade(label='View', menu=view_menu)
         # -----
         power_menu = tk.Menu(menu_bar, tearoff=0)
@@ -170,6 +175,7 @@ class BoardEditor:  # pylint: disable=R0902
 
     def calc(self):
         '''Translates the circuit into Primitives and sets it to self.crc.'''
+        from tkinter import messagebox  # pylint: disable=C0415
         try:
             self.crc = self.board.calc()
             self.board.nodes.calc_voltages(
@@ -181,55 +187,141 @@ class BoardEditor:  # pylint: disable=R0902
                 messagebox.showerror('Error', 'NO PINS SPECIFIED')
             self.crc = Primitive(math.inf)
 
+    def write(self, file):
+        '''Writes the sketch (see sketch.write) to the file opened in text
+        mode.'''
+        sketch.write(file, self.board, get_unit('U' if self.powerv else 'I'),
+                     self.power)
+
+    def read(self, file):
+        '''Replaces the sketch with the one read from the file opened in text
+        mode (see sketch.records). It is read into a new Board, so the sketch
+        isn't changed if the file is wrong (SketchFormatError is raised).'''
+        board = Board()
+        unit, value = sketch.load(file, board, self)
+        self.board = board
+        self.set_power(unit == get_unit('U'), value)
+
     def dump(self):
         '''Returns a bytes interpretation of the sketch.'''
-        buffer = self.tkroot, self.canvas, self.auto, self.stop
-        del self.tkroot, self.canvas
-        self.auto, self.stop = self.auto.get(), self.stop.get()
-        dumped = pickle.dumps(self)
-        self.tkroot, self.canvas, self.auto, self.stop = buffer
-        return dumped
+        buffer = io.StringIO()
+        self.write(buffer)
+        return buffer.getvalue().encode()
 
     def load(self, data):
         '''Loads a bytes interpretation of the sketch.'''
-        loaded = pickle.loads(data)
-        loaded.tkroot, loaded.canvas = self.tkroot, self.canvas
-        self.stop.set(loaded.stop)
-        self.auto.set(loaded.auto)
-        loaded.auto, loaded.stop = self.auto, self.stop
-        loaded.make_tk()
-        self.newself = loaded
-
-    def point(self, pos):
-        '''Makes a point at pos (Pos) on the canvas.'''
-        self.canvas.create_oval(pos.x_coord, pos.y_coord,
-                                pos.x_coord, pos.y_coord,
-                                width=1, fill='black')
-
-    def render(self):  # pylint: disable=R0912
-        '''Clears the canvas, draws the coordinate points, renders all
-        elements, writes info about resistors and the circuit and handles tk
-        events.
-        Returns self but this can be freshly loaded new self which should be
-        treated as self and be updated so the best usage of this function is:
-
-            while 1:
-                board_editor = board_editor.render()
-        '''
-        if self.stop.get():
-            sys.exit()
-        self.canvas.delete('all')  # clear canvas
+        self.read(io.StringIO(data.decode()))
+
+    def point(self, x_coord, y_coord):
+        '''Makes a point of the grid at x_coord, y_coord on the canvas.'''
+        self.canvas.create_oval(x_coord, y_coord, x_coord, y_coord,
+                                width=1, fill='black', tags='grid')
+
+    @staticmethod
+    def tag(kind, pos):
+        '''Gets the tag of canvas items of the Element at pos.
+        param kind ('t' or 'o') - TElement or OElement'''
+        return kind + '_'.join(map(str, pos))
+
+    def draw(self, kind, pos):
+        '''Makes canvas items of the Element at pos (if there is one).'''
+        tag = self.tag(kind, pos)
+        if kind == 't' and pos in self.board.tels:
+            x_coord, y_coord, orient = pos
+            self.board.tels[pos].render(
+                x_coord * self.elsize - self.x_coord,
+                y_coord * self.elsize - self.y_coord, self.elsize, orient,
+                ('element', 'tel', tag))
+        if kind == 'o' and pos in self.board.oels:
+            x_coord, y_coord = pos
+            self.board.oels[pos].render(
+                x_coord * self.elsize - self.x_coord,
+                y_coord * self.elsize - self.y_coord, self.elsize,
+                ('element', 'oel', tag))
+
+    def area(self):
+        '''Gets (x_min, y_min, x_max, y_max) of places which can be seen in
+        the window (with the margin, so Elements sticking into the window
+        from outside are in it too).'''
+        return (self.x_coord // self.elsize - 1,
+                self.y_coord // self.elsize - 1,
+                (self.x_coord + self.size.x_coord) // self.elsize + 1,
+                (self.y_coord + self.size.y_coord) // self.elsize + 1)
+
+    def in_area(self, pos):
+        '''Checks if the place pos (x, y, ...) can be seen in the window.'''
+        x_min, y_min, x_max, y_max = self.area()
+        return x_min <= pos[0] <= x_max and y_min <= pos[1] <= y_max
+
+    def redraw_view(self):
+        '''Moves (and scales) canvas items of Elements if the view has
+        changed (scrolling, zooming or resizing), deletes items of Elements
+        which can't be seen any more, draws the ones which can be seen now
+        (found by Board.tiles) and makes the grid again.'''
+        view = (self.x_coord, self.y_coord, self.elsize, self.size.x_coord,
+                self.size.y_coord)
+        if view == self.view:
+            return
+        if self.view is not None:
+            x_coord, y_coord, elsize = self.view[:3]
+            if elsize != self.elsize:
+                factor = self.elsize / elsize
+                self.canvas.scale('element', 0, 0, factor, factor)
+                x_coord, y_coord = x_coord * factor, y_coord * factor
+            self.canvas.move('element', x_coord - self.x_coord,
+                             y_coord - self.y_coord)
+        self.view = view
+        shown = set(self.board.tiles.find(*self.area()))
+        for kind, pos in self.shown - shown:
+            self.canvas.delete(self.tag(kind, pos))
+        for kind, pos in shown - self.shown:
+            self.draw(kind, pos)
+        self.shown = shown
+        self.canvas.delete('grid')
         for x_coord in range(self.x_coord // self.elsize,
                              (self.size.x_coord + self.x_coord)
                              // self.elsize + 1):
             for y_coord in range(self.y_coord // self.elsize,
                                  (self.size.y_coord + self.y_coord)
                                  // self.elsize + 1):
-                self.point(Pos(x_coord * self.elsize - self.x_coord,
-                               y_coord * self.elsize - self.y_coord))
-        # add the coord points
+                self.point(x_coord * self.elsize - self.x_coord,
+                           y_coord * self.elsize - self.y_coord)
+        self.canvas.tag_lower('grid')
+        self.canvas.tag_raise('oel')
+        self.canvas.tag_raise('info')
+        self.canvas.coords('info', 0, self.size.y_coord)
+
+    def redraw_elements(self):
+        '''Makes canvas items again only for Elements touched on the Board
+        since the last time (see Board.touch) which can be seen.'''
+        touched, self.board.touched = self.board.touched, []
+        if not touched:
+            return
+        if (None, None) in touched:
+            self.canvas.delete('element')
+            self.shown = set(self.board.tiles.find(*self.area()))
+            for kind, pos in self.shown:
+                self.draw(kind, pos)
+        else:
+            for kind, pos in set(touched):
+                self.canvas.delete(self.tag(kind, pos))
+                self.shown.discard((kind, pos))
+                if self.in_area(pos):
+                    self.draw(kind, pos)
+                    self.shown.add((kind, pos))
+        self.canvas.tag_raise('oel')
+        self.canvas.tag_raise('info')
+
+    def redraw_info(self):
+        '''Writes info about resistors and the circuit again if it could
+        change.'''
+        key = (self.board, self.board.version, self.board.value_version,
+               self.board.last_calc, self.crc, self.power, self.powerv)
+        if key == self.info_key:
+            return
+        self.info_key = key
         txt = ''
-        for teli, tel in self.board.tels.items():
+        for tel in self.board.tels.values():
             if str(tel) == 'Resistor':
                 txt += repr(tel)  # add the info about every resistor
                 first = True
@@ -242,15 +334,6 @@ class BoardEditor:  # pylint: disable=R0902
                            get_unit(infoi) + '\n'
                 if txt[-1] != '\n':
                     txt += '\n'
-            teli = Pos(teli)  # and render it
-            if teli.t_tuple != self.in_motion.t_tuple:
-                tel.render(teli.x_coord * self.elsize - self.x_coord,
-                           teli.y_coord * self.elsize - self.y_coord,
-                           self.elsize, teli.orient)
-            else:
-                tel.render(self.newpos.x_coord - self.shift.x_coord,
-                           self.newpos.y_coord - self.shift.y_coord,
-                           self.elsize, teli.orient)
         txt += 'R\N{LATIN SMALL LETTER Z WITH STROKE}=' + \
             ('\N{INFINITY}' if self.crc.ph_r == math.inf
              else str(self.crc.ph_r))  # add the whole circuit info
@@ -263,18 +346,41 @@ class BoardEditor:  # pylint: disable=R0902
             '\N{INFINITY}' if (self.crc.ph_r == 0) else (
                 self.power / self.crc.ph_r)))
         txt += ' U=' + u_txt + ' I=' + i_txt
-        self.canvas.create_text(0, self.size.y_coord, font='TkFixedFont',
-                                anchor='sw', text=txt)
-        for oeli, oel in self.board.oels.items():  # render every oel
-            oeli = Pos(oeli)
-            oel.render(oeli.x_coord * self.elsize - self.x_coord,
-                       oeli.y_coord * self.elsize - self.y_coord, self.elsize)
+        if not self.canvas.find_withtag('info'):
+            self.canvas.create_text(0, self.size.y_coord, font='TkFixedFont',
+                                    anchor='sw', tags='info')
+        self.canvas.itemconfigure('info', text=txt)
+
+    def render(self):
+        '''Updates the canvas: moves canvas items when the view has changed,
+        draws again only touched elements which can be seen, moves the
+        dragged one and writes info about resistors and the circuit (if it
+        could change). Then it handles tk events.
+        Returns self so the best usage of this function is:
+
+            while 1:
+                board_editor = board_editor.render()
+        '''
+        if self.stop.get():
+            sys.exit()
+        if self.board.touched is None:  # the Board hasn't been drawn yet
+            self.board.watch()
+            self.canvas.delete('element')
+            self.view, self.shown = None, set()
+        self.redraw_view()
+        self.redraw_elements()
+        self.redraw_info()
+        if self.in_motion.t_tuple in self.board.tels:  # move the dragged one
+            tag = self.tag('t', self.in_motion.t_tuple)
+            coords = self.canvas.coords(tag)  # the first item starts at pos
+            if coords:
+                self.canvas.move(
+                    tag, self.newpos.x_coord - self.shift.x_coord - coords[0],
+                    self.newpos.y_coord - self.shift.y_coord - coords[1])
         self.tkroot.update_idletasks()
         self.tkroot.update()  # tk stuff
         if self.auto.get():
             self.calc()
-        if self.newself:  # if new self is loaded, change self to newself
-            return self.newself
         return self
 
     def on_click1(self, event):
@@ -294,15 +400,11 @@ class BoardEditor:  # pylint: disable=R0902
     def on_rel1(self, event):
         '''Handles on_release events with the primary mouse button.
         Finishes moving elements on the board.'''
-        if self.in_motion.t_tuple in self.board.tels.keys() \
-            and pround(event.x + self.x_coord, event.y + self.y_coord,
-                       self.elsize, True).t_tuple != self.in_motion.t_tuple:
-            self.board.tels[
-                pround(event.x + self.x_coord,
-                       event.y + self.y_coord,
-                       self.elsize, True).t_tuple
-                ] = self.board.tels[self.in_motion.t_tuple]
-            self.board.tels.pop(self.in_motion.t_tuple)
+        self.board.move_tel(self.in_motion.t_tuple,
+                            pround(event.x + self.x_coord,
+                                   event.y + self.y_coord,
+                                   self.elsize, True).t_tuple)
+        self.board.touch('t', self.in_motion.t_tuple)  # if it is not moved
         self.in_motion = Pos(-1, -1)
         self.shift = Pos(-1, -1)
 
@@ -317,6 +419,7 @@ class BoardEditor:  # pylint: disable=R0902
 
     def on_key(self, event):  # pylint: disable=R0912
         '''Handles on_key events.'''
+        from tkinter import messagebox  # pylint: disable=C0415
         event.x += self.x_coord
         event.y += self.y_coord
         if len(event.keysym) > 1 and event.keysym[:1] == 'F':
@@ -367,6 +470,7 @@ class BoardEditor:  # pylint: disable=R0902
 
     def input_float(self, msg):
         '''Makes the tk dialog asking about a float value.'''
+        from tkinter import simpledialog  # pylint: disable=C0415
         buffer = simpledialog.askfloat('Input', msg,
                                        parent=self.tkroot, minvalue=0.0)
         self.canvas.focus_set()
@@ -385,15 +489,24 @@ class BoardEditor:  # pylint: disable=R0902
         '''Opens a file with the sketch interpretation and loads it.
         param file (str) - file's path
                            if None: it makes a dialog asking about the path'''
+        from tkinter import filedialog, messagebox  # pylint: disable=C0415
         if file is None:
             file = filedialog.askopenfilename(filetypes=(
                 ('sketch files', '*.sk'), ('all files', '*.*')))
         if not file:
             return False
-        file_handle = open(file, mode='rb')
-        self.load(file_handle.read())
-        file_handle.close()
-        self.newself.lastfile = file
+        if not sketch.is_sketch(file):
+            messagebox.showerror('Error', 'NOT A SKETCH FILE (OLD FILES CAN '
+                                 'BE CONVERTED BY sketch.py)')
+            return False
+        try:
+            with open(file, encoding='utf-8') as file_handle:
+                self.read(file_handle)
+        except (sketch.SketchFormatError, UnicodeDecodeError,
+                OSError) as error:
+            messagebox.showerror('Error', f'CAN\'T OPEN THE SKETCH: {error}')
+            return False
+        self.lastfile = file
         return True
 
     def save(self, file=None):
@@ -402,6 +515,7 @@ class BoardEditor:  # pylint: disable=R0902
                                  if None: makes a dialog asking about the path
                                           or takes the last used if present
                                  if -1: forces making dialog (Save as...)'''
+        from tkinter import filedialog  # pylint: disable=C0415
         if (file is None) and (self.lastfile is not None):
             file = self.lastfile
         elif (file is None) or (file == -1):
@@ -409,10 +523,9 @@ class BoardEditor:  # pylint: disable=R0902
                 ('sketch files', '*.sk'), ('all files', '*.*')))
         if not file:
             return False
-        file_handle = open(file, mode='wb')
-        file_handle.write(self.dump())
+        with open(file, mode='w', encoding='utf-8') as file_handle:
+            self.write(file_handle)
         self.lastfile = file
-        file_handle.close()
         return True
 
     def zoom(self, inc):
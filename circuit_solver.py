@@ -27,9 +27,16 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 '''
 
+from collections import OrderedDict
+from heapq import heappush, heappop
+from itertools import combinations
 from math import inf
 
-from primitives import Primitive, Series, Parallel, Delta, get_unit
+from primitives import Primitive, Series, Parallel, Delta, Star, Mesh, \
+    get_unit
+
+PLANS_SIZE = 32  # reduction plans remembered by Nodes.interpret
+PLANS = OrderedDict()  # fingerprint -> plan (LRU), shared by all Nodes
 
 
 class Nodes:
@@ -37,56 +44,139 @@ class Nodes:
     which are connected with Wire). It is needed to translate and simplify
     the Board into a circuit made from Primitives.'''
     def __init__(self):
-        self.nodes = {}
+        self.nodes = []
+        self.parents = {}
+        self.ranks = {}
+        self.indexes = {}
         self.node_voltages = []
         self.data = []
+        self.incidence = {}  # node -> {index of the element: None}
+        self.worklist = {}  # nodes to check by processors: {node: None}
+        self.reducible = {}  # nodes of degree 3: {node: None}
+        self.candidates = []  # heap of (degree, node) for process_star
+        self.eliminated = []  # (node, components connected when removed)
         self.start, self.end = (-1,) * 2
+        self.positions = {}  # id of the element -> its index in self.data
+        self.plan = None  # steps of the reduction being recorded
+        self.recorded = None  # the plan recorded by the last interpret
+        self.workers = 0  # processes simplifying blocks (see reduce_blocks)
+
+    def __setstate__(self, state):
+        self.__init__()  # attributes pickled before they existed
+        self.__dict__.update(state)
 
     def reset_nodes(self):
         '''Deletes all known nodes.'''
         self.nodes = []
+        self.parents = {}
+        self.ranks = {}
+        self.indexes = {}
+
+    def find(self, coords):
+        '''Gets the representative coordinates of the set containing coords
+        (which have to be known) and compresses the path to it.'''
+        root = coords
+        while self.parents[root] != root:
+            root = self.parents[root]
+        while coords != root:
+            self.parents[coords], coords = root, self.parents[coords]
+        return root
+
+    def union(self, coords, coords2):
+        '''Merges the sets containing coords and coords2 (union by rank).'''
+        root, root2 = self.find(coords), self.find(coords2)
+        if root == root2:
+            return
+        if self.ranks[root] < self.ranks[root2]:
+            root, root2 = root2, root
+        self.parents[root2] = root
+        if self.ranks[root] == self.ranks[root2]:
+            self.ranks[root] += 1
+        self.indexes = None
+
+    def renumber(self):
+        '''Gives the consecutive indexes to all nodes in order of the first
+        appearance of their coordinates and rebuilds self.nodes.'''
+        self.indexes = {}
+        self.nodes = []
+        for coords in self.parents:
+            root = self.find(coords)
+            if root not in self.indexes:
+                self.indexes[root] = len(self.nodes)
+                self.nodes += [[]]
+            self.nodes[self.indexes[root]] += [coords]
 
     def search_node(self, x_coord, y_coord):
         '''Looks for the index of the node which contains x_coord, y_coord.'''
-        for i, ele in enumerate(self.nodes):
-            if (x_coord, y_coord) in ele:
-                return i
-        return -1
+        if (x_coord, y_coord) not in self.parents:
+            return -1
+        if self.indexes is None:
+            self.renumber()
+        return self.indexes[self.find((x_coord, y_coord))]
 
     def add_node(self, x_coord, y_coord, x2_coord=-1, y2_coord=-1):
         '''Adds new node with a position x_coord, y_coord. There can be
         specified x2_coord, y2_coord to connect the new (or existing) first
         node with the new (or existing) second node.'''
-        node_index = self.search_node(x_coord, y_coord)
-        node2_index = self.search_node(x2_coord, y2_coord)
-        new_index = -1
-        if node_index == -1 and node2_index == -1:
-            new_index = len(self.nodes)
-            self.nodes += [[]]
-        elif (node_index == -1) != (node2_index == -1):
-            new_index = node_index + node2_index + 1  # a or b
-        elif node_index != node2_index:
-            self.nodes[node_index] += self.nodes[node2_index]
-            del self.nodes[node2_index]
-            return
-        if (x_coord, y_coord) not in self.nodes[new_index] and \
-                -1 not in (x_coord, y_coord):
-            self.nodes[new_index] += [(x_coord, y_coord)]
-        if (x2_coord, y2_coord) not in self.nodes[new_index] and \
-                -1 not in (x2_coord, y2_coord):
-            self.nodes[new_index] += [(x2_coord, y2_coord)]
+        known = []
+        for coords in ((x_coord, y_coord), (x2_coord, y2_coord)):
+            if -1 in coords:
+                continue
+            if coords not in self.parents:
+                self.parents[coords] = coords
+                self.ranks[coords] = 0
+                self.indexes = None
+            known += [coords]
+        if len(known) == 2:
+            self.union(*known)
+
+    def link(self, element, connect=True):
+        '''Adds the element to self.data and to the incidence index.
+        Both nodes of the element are added to the worklist.
+        If connect is False, the element only gets its index (and is recorded
+        in the plan) but it is left as a hole in self.data.
+        Returns the index of the element.'''
+        index = len(self.data)
+        self.data += [element if connect else None]
+        self.positions[id(element)] = index
+        if self.plan is not None:
+            self.plan += [(str(element),
+                           [self.positions[id(x)] for x in element.components],
+                           element.extra_info(),
+                           element.node_a, element.node_b)]
+        if not connect:
+            return index
+        for node in (element.node_a, element.node_b):
+            self.incidence.setdefault(node, {})[index] = None
+            self.worklist[node] = None
+            self.update_reducible(node)
+        return index
+
+    def unlink(self, index):
+        '''Removes the element with the index from self.data (leaving a hole
+        so other indexes don't change) and from the incidence index.
+        Both nodes of the element are added to the worklist.'''
+        element = self.data[index]
+        self.data[index] = None
+        for node in (element.node_a, element.node_b):
+            self.incidence[node].pop(index, None)
+            self.worklist[node] = None
+            self.update_reducible(node)
+
+    def update_reducible(self, node):
+        '''Adds the node to self.reducible if it has degree 3 or removes it
+        from there otherwise.'''
+        if len(self.incidence[node]) == 3:
+            self.reducible[node] = None
+        else:
+            self.reducible.pop(node, None)
 
     def datasearch(self, node_a, node_b=-1):
         '''Looks for all resistors connecting node_a and node_b.'''
-        results = []
-        for i, connection in enumerate(self.data):
-            if connection.node_a == node_a:
-                if node_b in (connection.node_b, -1):
-                    results += [i]
-            elif connection.node_b == node_a:
-                if node_b in (connection.node_a, -1):
-                    results += [i]
-        return results
+        indexes = self.incidence.get(node_a, {})
+        if node_b == -1:
+            return list(indexes)
+        return [i for i in indexes if self.other_side(i, node_a) == node_b]
 
     def other_side(self, index, known):
         '''Gets another node of the element with the index.
@@ -96,162 +186,646 @@ class Nodes:
         '''
         return self.data[index].node_a + self.data[index].node_b - known
 
-    def without(self, arr):
-        '''Returns self.data without elements with indexes contained in arr.'''
-        return list(map(lambda x: x[1],
-                        filter(lambda x: x[0] not in arr,
-                               enumerate(self.data))))
+    def new_node(self):
+        '''Adds a new node (not placed on the Board) and returns its index.'''
+        self.nodes += [[]]
+        return len(self.nodes) - 1
+
+    def named_node(self, name):
+        '''Gets the index of the node with the name (not placed on the Board,
+        e.g. from a netlist). The node is added if it isn't known.'''
+        if self.indexes is None:
+            self.renumber()
+        if name not in self.indexes:
+            self.indexes[name] = self.new_node()
+            self.nodes[-1] += [name]
+        return self.indexes[name]
+
+    def triangles(self):
+        '''Yields triangles (node, node2, node3) in the circuit where the node
+        is an inner node of degree 3. Only such triangles are transformed
+        by process_delta, so only neighbours of self.reducible are checked.'''
+        for node in self.reducible:
+            if node in (self.start, self.end):
+                continue
+            others = [self.other_side(i, node) for i in self.incidence[node]]
+            for node2, node3 in combinations(others, 2):
+                if len(self.incidence[node2]) > len(self.incidence[node3]):
+                    node2, node3 = node3, node2
+                if self.datasearch(node2, node3):
+                    yield node, node2, node3
+
+    def triangle_score(self, triangle):
+        '''Gets the score of the triangle (lower is better) for process_delta.
+        The best are triangles with many nodes of degree 3, because after the
+        transformation they can be simplified as Series, which removes them
+        together with the new node.'''
+        degrees = [len(self.incidence[node]) for node in triangle]
+        reducible = sum(1 for node, degree in zip(triangle, degrees)
+                        if degree == 3 and node not in (self.start, self.end))
+        return -reducible, sum(degrees)
 
     def process_delta(self):
         '''Tries to find a Delta connection in the Board and process (simplify
-        and remove old connections) it if present.'''
-        for first_node in range(len(self.nodes)):
-            for first in self.datasearch(first_node):
-                second_node = self.other_side(first, first_node)
-                for second in self.datasearch(second_node):
-                    third_node = self.other_side(second, second_node)
-                    for third in self.datasearch(third_node):
-                        fourth_node = self.other_side(third, third_node)
-                        if fourth_node == first_node:
-                            ndata = self.without((first, second, third))
-                            delta_a = Delta(self.data[first],
-                                            self.data[second],
-                                            self.data[third], 1)
-                            delta_b = Delta(self.data[first],
-                                            self.data[second],
-                                            self.data[third], 2)
-                            delta_c = Delta(self.data[first],
-                                            self.data[second],
-                                            self.data[third], 3)
-                            delta_a.node_a, delta_b.node_a, \
-                                delta_c.node_a = first_node, third_node, \
-                                second_node
-                            delta_a.node_b, delta_b.node_b, \
-                                delta_c.node_b = [len(self.nodes)] * 3
-                            ndata += [delta_a, delta_b, delta_c]
-                            return ndata
+        and remove old connections) it if present.
+        It should be run when there are no other connections to simplify,
+        because the circuit has to be without Parallel connections.'''
+        best, best_score = None, None
+        for triangle in self.triangles():
+            score = self.triangle_score(triangle)
+            if best is None or score < best_score:
+                best, best_score = triangle, score
+                if score[0] == -3:
+                    break
+        if best is None or best_score[0] == 0:
+            return None  # without degree-3 nodes it can loop with process_star
+        node, node2, node3 = best
+        connections = (self.datasearch(node, node2)[0],
+                       self.datasearch(node2, node3)[0],
+                       self.datasearch(node3, node)[0])
+        components = [self.data[index] for index in connections]
+        center = self.new_node()
+        for index in connections:
+            self.unlink(index)
+        for wiring_type, vertex in ((1, node2), (2, node), (3, node3)):
+            delta = Delta(*components, wiring_type)
+            delta.node_a, delta.node_b = vertex, center
+            self.link(delta)
+        return True
+
+    def process_star(self):
+        '''Eliminates the node with the minimum degree (not the start nor
+        the end) using the star-mesh transformation. It can simplify every
+        circuit but it makes a lot of connections from nodes with high degrees
+        so it should be run when there are no other connections to simplify.'''
+        while self.candidates:
+            degree, node = heappop(self.candidates)
+            connections = self.datasearch(node)
+            if degree != len(connections) or not connections or \
+                    node in (self.start, self.end):
+                continue  # outdated entry
+            components = [self.data[index] for index in connections]
+            others = [self.other_side(index, node) for index in connections]
+            for index in connections:
+                self.unlink(index)
+            star = Star(*components)  # shared, so every Mesh is O(1)
+            star.node_a, star.node_b = node, node
+            self.link(star, False)
+            for first, second in combinations(range(len(components)), 2):
+                mesh = Mesh(star, first, second)
+                mesh.node_a, mesh.node_b = others[first], others[second]
+                self.link(mesh)
+            self.eliminated += [(node, components)]
+            return True
         return None
 
-    def process_series(self):
-        '''Tries to find a Series connection in the Board and process (simplify
+    def process_series(self, node):
+        '''Tries to find a Series connection at the node and process (simplify
         and remove old connections) it if present.'''
-        for node in range(len(self.nodes)):
-            if node not in (self.start, self.end):
-                connections = self.datasearch(node)
-                if len(connections) == 2:
-                    ndata = self.without(connections)
-                    series = Series(self.data[connections[0]],
-                                    self.data[connections[1]])
-                    series.node_a, series.node_b = \
-                        self.other_side(connections[0], node), \
-                        self.other_side(connections[1], node)
-                    ndata += [series]
-                    return ndata
-        return None
+        if node in (self.start, self.end):
+            return None
+        connections = self.datasearch(node)
+        if len(connections) != 2:
+            return None
+        series = Series(self.data[connections[0]],
+                        self.data[connections[1]])
+        series.node_a, series.node_b = \
+            self.other_side(connections[0], node), \
+            self.other_side(connections[1], node)
+        self.eliminated += [(node, list(series.components))]
+        for index in connections:
+            self.unlink(index)
+        self.link(series)
+        return True
 
-    def process_parallel(self):
-        '''Tries to find a Parallel connection in the Board and process
-        (simplify and remove old connections) it if present.'''
-        for index, connection in enumerate(self.data):
-            for index2, connection2 in enumerate(self.data):
-                nodes_of_conn = connection.node_a, connection.node_b
-                nodes_of_conn2 = connection2.node_a, connection2.node_b
-                if index != index2 and nodes_of_conn in \
-                        (nodes_of_conn2, nodes_of_conn2[::-1]):
-                    ndata = self.without((index, index2))
-                    parallel = Parallel(connection, connection2)
-                    parallel.node_a, parallel.node_b = \
-                        connection.node_a, connection.node_b
-                    ndata += [parallel]
-                    return ndata
-        return None
+    def process_parallel(self, node):
+        '''Tries to find Parallel connections at the node and process
+        (simplify and remove old connections) them if present.
+        Elements are grouped by their other side, so every group of
+        elements connecting the same pair of nodes becomes one Parallel.'''
+        buckets = {}  # other side -> indexes
+        for index in self.datasearch(node):
+            buckets.setdefault(self.other_side(index, node), []).append(index)
+        found = None
+        for bucket in buckets.values():
+            if len(bucket) > 1:
+                parallel = Parallel(*(self.data[i] for i in bucket))
+                parallel.node_a, parallel.node_b = \
+                    self.data[bucket[0]].node_a, self.data[bucket[0]].node_b
+                for index in bucket:
+                    self.unlink(index)
+                self.link(parallel)
+                found = True
+        return found
 
-    def process_unnecessary(self):
-        '''Tries to find unnecessary connections in the Board and process
+    def process_unnecessary(self, node):
+        '''Tries to find unnecessary connections at the node and process
         (remove these connections) it if present.'''
-        removed = []
-        for node in range(len(self.nodes)):
-            if node not in (self.start, self.end):
-                connections = self.datasearch(node)
-                if len(connections) == 1:
-                    removed += connections
-        for connection_i, connection in enumerate(self.data):
-            if connection.node_a == connection.node_b:
-                removed += [connection_i]
-        return self.without(removed) if removed else None
-
-    processors = [process_unnecessary, process_series,
-                  process_parallel, process_delta]
-
-    def interpret(self, data, start, end):
+        connections = self.datasearch(node)
+        removed = [i for i in connections if self.other_side(i, node) == node]
+        if not removed and len(connections) == 1 and \
+                node not in (self.start, self.end):
+            removed = connections
+            self.eliminated += [(node, [self.data[connections[0]]])]
+        for index in removed:
+            self.unlink(index)
+        return True if removed else None
+
+    processors = [process_unnecessary, process_series, process_parallel]
+
+    def prune(self):
+        '''Removes (in one traversal) all elements which can't conduct current
+        between self.start and self.end: these not connected with them,
+        connecting a node with itself or ending with a node of degree 1
+        (dead ends are removed one by one like by process_unnecessary).
+        If the pins are shorted or not connected, everything is removed.
+        Only nodes which are left are added to the worklist.'''
+        found = {self.start}
+        stack = [self.start]
+        while stack:
+            node = stack.pop()
+            for index in self.incidence.get(node, ()):
+                other = self.other_side(index, node)
+                if other not in found:
+                    found.add(other)
+                    stack.append(other)
+        if self.end not in found or self.start == self.end:
+            found = set()
+        for index, element in enumerate(self.data):
+            if element is not None and (element.node_a not in found or
+                                        element.node_a == element.node_b):
+                self.unlink(index)
+        stack = [node for node in found if len(self.incidence[node]) == 1]
+        while stack:
+            node = stack.pop()
+            if len(self.incidence[node]) != 1 or \
+                    node in (self.start, self.end):
+                continue
+            index = next(iter(self.incidence[node]))
+            other = self.other_side(index, node)
+            self.eliminated += [(node, [self.data[index]])]
+            self.unlink(index)
+            stack.append(other)
+        self.worklist = {node: None for node, indexes in self.incidence.items()
+                         if indexes}
+
+    def blocks(self):
+        '''Gets biconnected blocks (lists of indexes of elements) of the part
+        of the circuit connected with self.start. It is the iterative
+        Tarjan's algorithm, so it works for very big circuits.'''
+        if not self.incidence.get(self.start):
+            return []
+        order, low = {self.start: 0}, {self.start: 0}
+        edges, found = [], []
+        stack = [(self.start, None, iter(self.incidence[self.start]))]
+        while stack:
+            node, via, indexes = stack[-1]
+            for index in indexes:
+                if index == via:
+                    continue
+                other = self.other_side(index, node)
+                if other not in order:
+                    order[other] = low[other] = len(order)
+                    edges.append(index)
+                    stack.append((other, index, iter(self.incidence[other])))
+                    break
+                if order[other] < order[node]:  # the edge to an ancestor
+                    edges.append(index)
+                    low[node] = min(low[node], order[other])
+            else:
+                stack.pop()
+                if not stack:
+                    continue
+                parent = stack[-1][0]
+                low[parent] = min(low[parent], low[node])
+                if low[node] >= order[parent]:  # parent separates the block
+                    block = []
+                    while not block or block[-1] != via:
+                        block.append(edges.pop())
+                    found.append(block)
+        return found
+
+    def split(self):
+        '''Splits the circuit into biconnected blocks and finds these which
+        are on the way between self.start and self.end (they are connected in
+        series). Other blocks can't conduct current, so they are removed (and
+        their nodes are recorded in self.eliminated).
+        Returns the list of (entry node, exit node, indexes of elements) of
+        blocks on the way from self.start.'''
+        blocks = self.blocks()
+        members = {}  # node -> numbers of blocks containing it
+        for number, block in enumerate(blocks):
+            for index in block:
+                for node in (self.data[index].node_a, self.data[index].node_b):
+                    members.setdefault(node, {})[number] = None
+        previous = {self.start: None}  # node -> (block number, node before)
+        used = set()
+        queue = [self.start]
+        for node in queue:
+            for number in members.get(node, ()):
+                if number in used:
+                    continue
+                used.add(number)
+                for index in blocks[number]:
+                    for other in (self.data[index].node_a,
+                                  self.data[index].node_b):
+                        if other not in previous:
+                            previous[other] = number, node
+                            queue.append(other)
+        if self.end not in previous:
+            return []
+        way, node = [], self.end
+        while previous[node] is not None:
+            number, before = previous[node]
+            way.append((before, node, blocks[number]))
+            node = before
+        way.reverse()
+        kept = {index for _, _, block in way for index in block}
+        reached = {node for entry, end, _ in way for node in (entry, end)}
+        reached.update(self.data[index].node_a for index in kept)
+        reached.update(self.data[index].node_b for index in kept)
+        hanging = []
+        queue = list(reached)
+        for node in queue:
+            for index in list(self.incidence.get(node, ())):
+                if index in kept:
+                    continue
+                other = self.other_side(index, node)
+                if other not in reached:
+                    reached.add(other)
+                    queue.append(other)
+                    hanging.append((other, [self.data[index]]))
+                self.unlink(index)
+        self.eliminated += reversed(hanging)
+        self.worklist = {node: None for node, indexes in self.incidence.items()
+                         if indexes}
+        return way
+
+    def reduce_blocks(self, way):
+        '''Simplifies every block (with more than one element) on the way
+        (see split) separately and puts the results into the circuit.
+        If self.workers is not 0, blocks are simplified by that many
+        processes. Only plans (see interpret) are sent between processes,
+        so the Primitives of the circuit are always the original ones.'''
+        way = [x for x in way if len(x[2]) > 1]
+        tasks = [([(self.data[i].node_a, self.data[i].node_b)
+                   for i in block], entry, end)
+                 for entry, end, block in way]
+        if self.workers and len(tasks) > 1:
+            # pylint: disable=C0415
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(self.workers) as executor:
+                plans = list(executor.map(reduce_block, *zip(*tasks)))
+        else:
+            plans = [reduce_block(*task) for task in tasks]
+        for (_, _, block), (plan, order, labels) in zip(way, plans):
+            self.apply([block[i] for i in order], plan, labels)
+
+    def apply(self, indexes, plan, labels):
+        '''Simplifies elements with indexes (in the order of the plan) as
+        the plan (made by reduce_block) says. Nodes of the plan are numbers
+        of labels (see fingerprint) and nodes made by it are added to
+        self.nodes. Only the result is put into the incidence index.'''
+        added, steps, eliminated, result = plan
+        first = len(self.nodes)
+        self.nodes += [[] for _ in range(added)]
+
+        def place(node):
+            return labels[node] if node < len(labels) \
+                else first + node - len(labels)
+        elements = [self.data[i] for i in indexes]
+        for number, index in enumerate(indexes):
+            if number != result:
+                self.unlink(index)
+        for kind, components, extra, node_a, node_b in steps:
+            container = self.rebuild(kind, [elements[i] for i in components],
+                                     extra)
+            container.node_a, container.node_b = place(node_a), place(node_b)
+            self.link(container, len(elements) == result)
+            elements.append(container)
+        self.eliminated += [(place(node), [elements[i] for i in components])
+                            for node, components in eliminated]
+
+    @staticmethod
+    def fingerprint(connections, start, end):
+        '''Gets the fingerprint of the topology of the circuit (it doesn't
+        depend on resistances) and the canonical order of connections.
+        Circuits with the same fingerprint are simplified in the same way
+        if their elements are given to interpret in the canonical order.
+        Nodes are numbered again in the order of the BFS from start, where
+        neighbours are visited in order of their degrees (and degrees of
+        their neighbours), so the fingerprint doesn't depend on where the
+        circuit is drawn or on the order of adding elements (unless such
+        neighbours are the same).
+        param connections (list) - (node_a, element, node_b) tuples like
+                                   these from Board.calc_res_bis
+        param start, end (int) - nodes where the power is connected
+        Returns the tuple: (fingerprint, list of indexes of connections,
+        labels), where labels is the list of nodes in the new order.'''
+        neighbours = {start: [], end: []}
+        for node_a, _, node_b in connections:
+            neighbours.setdefault(node_a, []).append(node_b)
+            neighbours.setdefault(node_b, []).append(node_a)
+        ranks = {node: (len(others), sorted(len(neighbours[x])
+                                            for x in others))
+                 for node, others in neighbours.items()}
+        labels, known = [], set()
+        for first in [start, end] + sorted(neighbours):
+            if first in known:
+                continue
+            known.add(first)
+            queue = [first]
+            for node in queue:
+                new = sorted({x for x in neighbours[node] if x not in known},
+                             key=lambda x: (ranks[x], x))
+                known.update(new)
+                queue += new
+            labels += queue
+        label = {node: i for i, node in enumerate(labels)}
+        pairs = [(label[node_a], label[node_b])
+                 for node_a, _, node_b in connections]
+        order = sorted(range(len(pairs)), key=pairs.__getitem__)
+        return (len(labels), label[start], label[end],
+                tuple(pairs[i] for i in order)), order, labels
+
+    @staticmethod
+    def rebuild(kind, components, extra):
+        '''Makes the container of the kind (like str of it) again from
+        components and extra_info of the original one.'''
+        if kind == 'Series':
+            return Series(*components)
+        if kind == 'Parallel':
+            return Parallel(*components)
+        if kind == 'Delta':
+            return Delta(*components, *extra)
+        if kind == 'Star':
+            return Star(*components)
+        if kind == 'Mesh':
+            return Mesh(*components, *extra)
+        raise RuntimeError(f'Not known kind "{kind}" of the plan.')
+
+    def replay(self, data, plan, labels):
+        '''Simplifies data in the same way as the circuit the plan was
+        recorded for, without looking for connections again.
+        param data (list) - elements in the same order as when recorded
+        param plan (tuple) - (count of new nodes, steps, eliminated, index
+                             of the result) made by interpret
+        param labels (list) - nodes numbered like in the plan (see
+                              fingerprint)'''
+        added, steps, eliminated, result = plan
+        first = len(self.nodes)
+
+        def place(node):
+            return labels[node] if node < len(labels) \
+                else first + node - len(labels)
+        self.nodes += [[] for _ in range(added)]
+        self.data = list(data)
+        for element in self.data:
+            element.parents = []  # forget circuits calculated before
+        for kind, components, extra, node_a, node_b in steps:
+            container = self.rebuild(kind, [self.data[i] for i in components],
+                                     extra)
+            container.node_a, container.node_b = place(node_a), place(node_b)
+            self.data += [container]
+        self.eliminated = [(place(node), [self.data[i] for i in components])
+                           for node, components in eliminated]
+        if result is None:
+            self.data = []
+            return Primitive(0) if self.start == self.end else Primitive(inf)
+        self.data = [self.data[result]]
+        return self.data[0]
+
+    def interpret(self, data, start, end, key=None, labels=None):
         '''Translates all data (Elements from the Board) to one circuit
         translation (made from Primitives), assuming that voltage or current
-        is connected between start (int) and end (int) nodes.'''
-        self.data, self.start, self.end = data, start, end
-        old_data = []
-        while repr(old_data) != repr(data):
-            old_data = data[:]
-            self.data = data
-            for processor in self.processors:
-                ndata = processor(self)
-                if ndata is not None:
-                    data = ndata
-                    if repr(processor) == repr(Nodes.process_delta):
-                        self.nodes += [[]]
-                    break
+        is connected between start (int) and end (int) nodes.
+        Processors are run only for nodes changed by the last simplification
+        (self.worklist) and process_delta or process_star is run when there
+        are none. Before them, prune removes parts which don't matter.
+        If labels (see fingerprint) are given, the reduction is recorded
+        with nodes numbered like in labels (in self.recorded). If the key
+        (see fingerprint) is given too, it is remembered (in PLANS, for all
+        Nodes) and replayed next time for the same key.'''
+        if self.indexes is None:
+            self.renumber()
+        self.data, self.incidence, self.worklist = [], {}, {}
+        self.reducible, self.positions = {}, {}
+        self.candidates, self.eliminated = [], []
+        self.start, self.end = start, end
+        if key is not None and key in PLANS:
+            PLANS.move_to_end(key)
+            return self.replay(data, PLANS[key], labels)
+        count = len(self.nodes)
+        for element in data:
+            element.parents = []  # forget circuits calculated before
+            self.link(element)
+        self.prune()
+        self.plan = [] if labels is not None else None
+        way = self.split()
+        if len(way) > 1:
+            self.reduce_blocks(way)
+        while self.worklist:
+            while self.worklist:
+                node = self.worklist.popitem()[0]
+                for processor in self.processors:
+                    if processor(self, node):
+                        break
+                else:
+                    heappush(self.candidates,
+                             (len(self.incidence.get(node, ())), node))
+            if not self.process_delta():
+                self.process_star()
+        steps, self.plan = self.plan, None
+        data = [element for element in self.data if element is not None]
+        if len(data) > 1:
+            raise RuntimeError('Can\'t find a processor to simplify the '
+                               'circuit.')
+        if labels is not None:
+            label = {node: i for i, node in enumerate(labels)}
+
+            def place(node):
+                return label[node] if node < count \
+                    else len(labels) + node - count
+            self.recorded = (
+                len(self.nodes) - count,
+                [(kind, components, extra, place(node_a), place(node_b))
+                 for kind, components, extra, node_a, node_b in steps],
+                [(place(node), [self.positions[id(x)] for x in components])
+                 for node, components in self.eliminated],
+                self.positions[id(data[0])] if data else None)
+            if key is not None:
+                PLANS[key] = self.recorded
+                if len(PLANS) > PLANS_SIZE:
+                    PLANS.popitem(last=False)
+        self.data = data
         if not data:
             if start == end:
                 return Primitive(0)
             return Primitive(inf)
-        if len(data) == 1:
-            return data[0]
-        raise RuntimeError('Can\'t find a processor to simplify the circuit.')
-
-    def recursive_figure_voltage(self, circuit, part):
-        '''Tries to calculate and set all voltage drops to Primitives
-        and Elements contained by the circuit.
-        param circuit - the whole circuit
-        param part - the currently analyzed part of the circuit'''
-        if str(part) == 'Primitive':  # is Primitive has no voltage drop?
-            return None
-        buffer = False
-        for component in part.components:
-            buffer = self.recursive_figure_voltage(circuit, component)
-        if (part.ph_u is not None) and \
-                ((self.node_voltages[part.node_a] is None)
-                 != (self.node_voltages[part.node_b] is None)) and \
-                part.node_a != circuit.node_b and \
-                part.node_b != circuit.node_b:  # '!=' = 'xor'
-            if self.node_voltages[part.node_a] is None:
-                self.node_voltages[part.node_a] = \
-                    self.node_voltages[part.node_b] + part.ph_u
+        return data[0]
+
+    def figure_voltages(self, circuit):
+        '''Calculates voltages of all nodes in one pass. The voltages of the
+        ends of the circuit are known, and every node eliminated by processors
+        (process_series, process_star or process_unnecessary) has known
+        voltages on the other sides of its components when self.eliminated is
+        read backwards. Such voltage is the average of these voltages
+        weighted by conductances of the components.
+        param circuit - the calculated circuit (with ph_u set)'''
+        self.node_voltages[circuit.node_a] = 0
+        self.node_voltages[circuit.node_b] = circuit.ph_u
+        for node, components in reversed(self.eliminated):
+            others = [self.node_voltages[x.node_a + x.node_b - node]
+                      for x in components]
+            if None in others:
+                continue
+            shorts = [y for x, y in zip(components, others) if x.ph_r == 0]
+            conductances = [1 / x.ph_r for x in components if x.ph_r != 0]
+            if shorts:  # the node has the voltage of the other side of 0 ohm
+                self.node_voltages[node] = shorts[0]
+            elif len(components) == 1 or not sum(conductances):
+                self.node_voltages[node] = others[0]  # no current flows
             else:
-                self.node_voltages[part.node_b] = \
-                    self.node_voltages[part.node_a] + part.ph_u
-            return True
-        if part.ph_u is None and \
-            None not in (self.node_voltages[part.node_a],
-                         self.node_voltages[part.node_b]):
-            part.ph_u = abs(self.node_voltages[part.node_a]
-                            - self.node_voltages[part.node_b])
-            return True
-        return buffer
+                self.node_voltages[node] = \
+                    sum(map(lambda x, y: x * y, conductances, others)) / \
+                    sum(conductances)
+
+    def assign_voltages(self, circuit):
+        '''Sets voltage drops and currents of all parts of the circuit (also
+        shared components of Delta and Mesh) from voltages of nodes. Every
+        part is visited only once. The current of 0 ohm parts can't be
+        figured from the voltage, so it is taken from the Series containing
+        them (like Series.spread does).
+        param circuit - the calculated circuit (made from Primitives)'''
+        # pylint: disable=W0212
+        visited, stack = set(), [(circuit, None)]
+        while stack:
+            part, container = stack.pop()
+            if id(part) in visited:
+                continue
+            visited.add(id(part))
+            stack += [(x, part) for x in part.components]
+            voltages = (self.node_voltages[part.node_a],
+                        self.node_voltages[part.node_b])
+            if None in voltages:
+                part.clear_iu()
+                continue
+            part._ph_u = abs(voltages[0] - voltages[1])
+            if part.ph_r != 0:
+                part._ph_i = part._ph_u / part.ph_r
+            elif str(container) == 'Series':
+                part._ph_i = container._ph_i
+            else:
+                part._ph_i = None
 
     def calc_voltages(self, circuit, unit, amount):
-        '''The launcher of recursive_figure_voltage which is calculating all
-        voltage drops.
+        '''Calculates voltages of all nodes and sets all voltage drops.
         param circuit - the calculated circuit (made from Primitives)
         param unit ('A' or 'V') - the unit of power
-        param amount (int or float) - the value of power'''
+        param amount (int or float) - the value of power
+        0 ohm resistors are allowed (python -m doctest circuit_solver.py):
+
+        >>> from netlist import solve
+        >>> netlist = ['divider', 'V1 a c 10', 'R1 a b 0', 'R2 b c 20']
+        >>> circuit, nodes = solve(netlist)
+        >>> [(x.uid, x.ph_u, x.ph_i) for x in nodes.leaves(circuit)]
+        [('R1', 0, 0.5), ('R2', 10.0, 0.5)]
+        '''
         if str(circuit) == 'Primitive':
             return
         self.node_voltages = [None] * len(self.nodes)
-        self.node_voltages[circuit.node_a] = 0
         if unit == get_unit('U'):
-            circuit.ph_u = amount
+            voltage = amount
         elif unit == get_unit('I'):
-            circuit.ph_i = amount
+            voltage = amount * circuit.ph_r
         else:
             raise RuntimeError(f'Not known unit "{unit}"" to calc.')
-        while self.recursive_figure_voltage(circuit, circuit):
-            pass
+        if str(circuit) == 'Network':
+            circuit.ph_u = voltage
+            for node, potential in circuit.potentials.items():
+                self.node_voltages[node] = \
+                    (circuit.potentials[circuit.node_a] - potential) \
+                    * circuit.ph_i
+            return
+        circuit._ph_u = voltage  # pylint: disable=W0212
+        self.figure_voltages(circuit)
+        self.assign_voltages(circuit)
+
+    @staticmethod
+    def leaves(circuit):
+        '''Gets the list of all Primitives without components (e.g. Resistors)
+        contained by the circuit.'''
+        found, visited, stack = [], set(), [circuit]
+        while stack:
+            part = stack.pop()
+            if id(part) in visited:
+                continue
+            visited.add(id(part))
+            if part.components:
+                stack += reversed(part.components)
+            else:
+                found += [part]
+        return found
+
+    def sweep(self, circuit, unit, amounts):
+        '''Calculates voltage drops and currents of all Resistors for every
+        value of power in amounts. The circuit is linear, so they are
+        calculated only once (by calc_voltages for 1 V or 1 A, which stay set
+        in the circuit) and then multiplied by amounts.
+        Returns the dict: leaf of the circuit -> {'U': voltages, 'I': currents}
+        where voltages and currents are NumPy arrays (or lists without NumPy)
+        of the same length as amounts.
+        param circuit - the calculated circuit (made from Primitives)
+        param unit ('A' or 'V') - the unit of power
+        param amounts (iterable of int or float) - values of power'''
+        try:
+            import numpy  # pylint: disable=C0415
+        except ImportError:  # sweeps are returned as lists then
+            numpy = None
+        if numpy is not None:
+            amounts = numpy.asarray(amounts, dtype=float)
+        else:
+            amounts = list(amounts)
+
+        def scale(factor):
+            if numpy is not None:
+                return amounts * factor
+            return [amount * factor for amount in amounts]
+        self.calc_voltages(circuit, unit, 1)
+        results = {}
+        for leaf in self.leaves(circuit):
+            results[leaf] = {
+                'U': scale(leaf.ph_u if leaf.ph_u is not None else 0),
+                'I': scale(leaf.ph_i if leaf.ph_i is not None else 0)}
+        return results
+
+
+def reduce_block(connections, start, end):
+    '''Simplifies the block of the circuit and returns the plan of it (see
+    Nodes.interpret). Resistances don't change the way of simplifying, so
+    only connections are needed and it can be run in another process.
+    Nodes of the block are numbered again from 0 (see Nodes.fingerprint),
+    so it doesn't depend on the size of the whole circuit, and the same
+    blocks share the plan (in PLANS).
+    param connections (list) - (node_a, node_b) of elements of the block
+    param start, end (int) - nodes joining the block with the circuit
+    Returns the tuple: (plan, the order of connections in the plan, labels
+    of nodes of the plan).'''
+    key, order, labels = Nodes.fingerprint(
+        [(node_a, None, node_b) for node_a, node_b in connections],
+        start, end)
+    if key in PLANS:
+        PLANS.move_to_end(key)
+        return PLANS[key], order, labels
+    label = {node: i for i, node in enumerate(labels)}
+    nodes = Nodes()
+    nodes.nodes = [[] for _ in labels]
+    data = []
+    for index in order:
+        element = Primitive(1)
+        element.node_a = label[connections[index][0]]
+        element.node_b = label[connections[index][1]]
+        data += [element]
+    nodes.interpret(data, label[start], label[end], key,
+                    list(range(len(labels))))
+    return nodes.recorded, order, labels
@@ -31,15 +31,24 @@ SOFTWARE.
 class Pos:
     '''It contains info about some coordintes on the BoardEditor.
     It can be coordinates of OElement or TElement.'''
+    __slots__ = ('x_coord', 'y_coord', 'orient')
+
     def __init__(self, *a):
-        while len(a) == 1:
+        if len(a) == 1:  # Pos(tuple)
             a = a[0]
         self.x_coord = int(a[0])
         self.y_coord = int(a[1])
-        if len(a) > 2:
-            self.orient = int(a[2])
-        else:
-            self.orient = -1
+        self.orient = int(a[2]) if len(a) > 2 else -1
+
+    def __getstate__(self):
+        return {'x_coord': self.x_coord, 'y_coord': self.y_coord,
+                'orient': self.orient}
+
+    def __setstate__(self, state):
+        if isinstance(state, tuple):  # (dict, slots)
+            state = {**(state[0] or {}), **(state[1] or {})}
+        self.x_coord, self.y_coord = state['x_coord'], state['y_coord']
+        self.orient = state.get('orient', -1)
 
     @property
     def t_tuple(self):
@@ -75,6 +84,14 @@ def ttoposb(tel):
         Pos(tel.x_coord, tel.y_coord + 1)
 
 
+def tel_ends(t_tuple):
+    '''Gets both places (as (x, y) tuples) which are connected by TElement
+    at t_tuple (x, y, orient) without making any Pos.'''
+    x_coord, y_coord, orient = t_tuple
+    return (x_coord, y_coord), \
+        ((x_coord + 1, y_coord) if orient == 0 else (x_coord, y_coord + 1))
+
+
 def pround(x_coord, y_coord, size, is_tel=False):
     '''Translates coordinates from the window of BoardEditor (in pixels) to Pos.
     It bases on the size of each element and on is_tel which defines will it
@@ -27,17 +27,22 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 '''
 
-from primitives import Primitive
+from primitives import (Primitive, get_unit, merge_state, restore_state,
+                        slot_names)
 
 
 class Element:
     '''The basic element. It is an object having Tk as a parent. This is
-    the parent of every circuit-related object displayed on the BoardEditor.'''
+    the parent of every circuit-related object displayed on the BoardEditor.
+    Subclasses declare parent and addr in their __slots__ (the Element
+    itself has none, so Resistor can be a Primitive too).'''
+    __slots__ = ()
+
     def __str__(self):
         return self.__class__.__name__
 
     def __init__(self, parent):
-        self.addr = super().__repr__().split('0x')[1][:-1]
+        self.addr = format(id(self), 'x')
         self.parent = parent
 
     @property
@@ -47,7 +52,15 @@ class Element:
         return {}
 
     def __repr__(self):
-        return str(vars(self))
+        return str({name: getattr(self, name) for name in slot_names(self)
+                    if hasattr(self, name)})
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in slot_names(self)
+                if hasattr(self, name)}
+
+    def __setstate__(self, state):
+        restore_state(self, merge_state(state))
 
     def on_key(self, event):
         '''Handles events of key presses.'''
@@ -62,8 +75,10 @@ class OElement(Element):
     |  |  |       its position is (1, 1)
     +--+--+
     '''
-    def render(self, x_coord, y_coord, size):
-        '''Renders OElement on the BoardEditor'''
+    __slots__ = ()
+
+    def render(self, x_coord, y_coord, size, tags=()):
+        '''Renders OElement on the BoardEditor (its canvas items get tags).'''
 
 
 class TElement(Element):
@@ -78,80 +93,84 @@ class TElement(Element):
     |  Y  |    Y  is a position of TElement
     +--Y--+       its position is (1, 1, 1)
     '''
-    def render(self, x_coord, y_coord, size, position):
-        '''Renders TElement on the BoardEditor'''
+    __slots__ = ()
+
+    def render(self, x_coord, y_coord, size, position, tags=()):
+        '''Renders TElement on the BoardEditor (its canvas items get tags).'''
 
 
 class Pin(OElement):
-    '''It is an OElement which labels some coordinate with some color.'''
+    '''It is an OElement which labels some coordinate with some color.
+    There can be only one Pin of each kind on the Board (see Board.new_oel).'''
+    __slots__ = ('parent', 'addr', 'color')
+
     def __init__(self, parent, color='black'):
         super().__init__(parent)
         self.color = color
-        deleted = []
-        for oel in self.parent.board.oels:
-            if str(self.parent.board.oels[oel]) == str(self):
-                deleted += [oel]
-        for oel in deleted:
-            del self.parent.board.oels[oel]
-
-    def render(self, x_coord, y_coord, size):
+
+    def render(self, x_coord, y_coord, size, tags=()):
         radius = size * 0.1
-        self.parent.canvas.create_arc(
-            x_coord - radius, y_coord - radius,
-            x_coord + radius, y_coord + radius,
-            start=0, extent=180,
-            outline=self.color, fill=self.color)
-        self.parent.canvas.create_arc(x_coord - radius, y_coord - radius,
-                                      x_coord + radius, y_coord + radius,
-                                      start=180, extent=180,
-                                      outline=self.color, fill=self.color)
+        for start in (0, 180):
+            self.parent.canvas.create_arc(
+                x_coord - radius, y_coord - radius,
+                x_coord + radius, y_coord + radius,
+                start=start, extent=180,
+                outline=self.color, fill=self.color, tags=tags)
         radius *= 2
-        self.parent.canvas.create_arc(x_coord - radius, y_coord - radius,
-                                      x_coord + radius, y_coord + radius,
-                                      start=0, extent=180,
-                                      outline=self.color, style='arc')
-        self.parent.canvas.create_arc(x_coord - radius, y_coord - radius,
-                                      x_coord + radius, y_coord + radius,
-                                      start=180, extent=180,
-                                      outline=self.color, style='arc')
+        for start in (0, 180):
+            self.parent.canvas.create_arc(
+                x_coord - radius, y_coord - radius,
+                x_coord + radius, y_coord + radius,
+                start=start, extent=180,
+                outline=self.color, style='arc', tags=tags)
 
 
 class APin(Pin):
     '''It is a red Pin which represents a '+' power supply.'''
+    __slots__ = ()
+
     def __init__(self, parent):
         super().__init__(parent, 'red')
 
 
 class BPin(Pin):
     '''It is a blue Pin which represents a '-' power supply.'''
+    __slots__ = ()
+
     def __init__(self, parent):
         super().__init__(parent, 'blue')
 
 
 class Wire(TElement):
     '''It is an element which connects two coordinates in Board.'''
-    def render(self, x_coord, y_coord, size, position):
+    __slots__ = ('parent', 'addr')
+
+    def render(self, x_coord, y_coord, size, position, tags=()):
         self.parent.canvas.create_line(x_coord, y_coord,
                                        x_coord if position == 1
                                        else (x_coord + size),
                                        y_coord if position == 0
-                                       else (y_coord + size))
+                                       else (y_coord + size), tags=tags)
 
 
 class Resistor(Primitive, TElement):
     '''It is a Resistor. It is TElement because it can be displayed (rendered)
     on the BoardEditor and it is a Primitive because it has its own specified
-    resistance and can be a part of a circuit.'''
+    resistance and can be a part of a circuit.
+    If value is None, the resistance is asked by parent.input_resistance,
+    else parent can be None (there is no BoardEditor then).'''
+    __slots__ = ('parent', 'addr', 'uid')
     resistor_i = 1
 
-    def __init__(self, parent, uid=None):
+    def __init__(self, parent, uid=None, value=None):
         super().__init__(parent)
         self.parent = parent
         if uid is None:
             uid = Resistor.resistor_i
             Resistor.resistor_i += 1
         self.uid = uid
-        self.ph_r = self.parent.input_resistance(uid)
+        self.ph_r = self.parent.input_resistance(uid) if value is None \
+            else value
         self.ph_u = None
 
     @property
@@ -163,42 +182,27 @@ class Resistor(Primitive, TElement):
     def __repr__(self):
         return '{' + str(self.uid) + '}'
 
-    def render(self, x_coord, y_coord, size, position):
-        if position == 0:
-            self.parent.canvas.create_line(x_coord, y_coord,
-                                           x_coord + 0.25 * size, y_coord)
-            self.parent.canvas.create_line(x_coord + 0.75 * size, y_coord,
-                                           x_coord + size, y_coord)
-            self.parent.canvas.create_line(
-                x_coord + 0.25 * size, y_coord + 0.2 * size,
-                x_coord + 0.75 * size, y_coord + 0.2 * size)
-            self.parent.canvas.create_line(
-                x_coord + 0.25 * size, y_coord - 0.2 * size,
-                x_coord + 0.75 * size, y_coord - 0.2 * size)
-            self.parent.canvas.create_line(
-                x_coord + 0.25 * size, y_coord + 0.2 * size,
-                x_coord + 0.25 * size, y_coord - 0.2 * size)
+    def on_key(self, event):
+        if event.keysym == 'r':  # change the resistance
+            new_value = self.parent.input_float(
+                'Value of R' + str(self.uid) + ' [' + get_unit('R') + ']')
+            if new_value is not None:
+                self.parent.board.set_resistance(self, new_value)
+
+    def render(self, x_coord, y_coord, size, position, tags=()):
+        lines = ((0, 0, 0.25, 0), (0.75, 0, 1, 0),  # (x, y, x2, y2) / size
+                 (0.25, 0.2, 0.75, 0.2), (0.25, -0.2, 0.75, -0.2),
+                 (0.25, 0.2, 0.25, -0.2), (0.75, 0.2, 0.75, -0.2))
+        for x_a, y_a, x_b, y_b in lines:
+            if position == 1:  # the vertical one is transposed
+                x_a, y_a, x_b, y_b = y_a, x_a, y_b, x_b
             self.parent.canvas.create_line(
-                x_coord + 0.75 * size, y_coord + 0.2 * size,
-                x_coord + 0.75 * size, y_coord - 0.2 * size)
+                x_coord + x_a * size, y_coord + y_a * size,
+                x_coord + x_b * size, y_coord + y_b * size, tags=tags)
+        if position == 0:
             self.parent.canvas.create_text(x_coord + 0.5 * size, y_coord,
-                                           text=str(self.uid))
-        if position == 1:
-            self.parent.canvas.create_line(x_coord, y_coord,
-                                           x_coord, y_coord + 0.25 * size)
-            self.parent.canvas.create_line(x_coord, y_coord + 0.75 * size,
-                                           x_coord, y_coord + size)
-            self.parent.canvas.create_line(
-                x_coord + 0.2 * size, y_coord + 0.25 * size,
-                x_coord + 0.2 * size, y_coord + 0.75 * size)
-            self.parent.canvas.create_line(
-                x_coord - 0.2 * size, y_coord + 0.25 * size,
-                x_coord - 0.2 * size, y_coord + 0.75 * size)
-            self.parent.canvas.create_line(
-                x_coord + 0.2 * size, y_coord + 0.25 * size,
-                x_coord - 0.2 * size, y_coord + 0.25 * size)
-            self.parent.canvas.create_line(
-                x_coord + 0.2 * size, y_coord + 0.75 * size,
-                x_coord - 0.2 * size, y_coord + 0.75 * size)
+                                           text=str(self.uid), tags=tags)
+        else:
             self.parent.canvas.create_text(
-                x_coord, y_coord + 0.5 * size, text=str(self.uid), angle=270)
+                x_coord, y_coord + 0.5 * size, text=str(self.uid), angle=270,
+                tags=tags)
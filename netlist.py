@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# file from https://github.com/Nircek/resistorer
+# licensed under MIT license
+
+'''
+MIT License
+
+Copyright (c) 2018-2019 Nircek
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import re
+import sys
+
+from circuit_solver import Nodes
+from elements import Resistor
+from primitives import get_unit
+
+SUFFIXES = {'f': 1e-15, 'p': 1e-12, 'n': 1e-9, 'u': 1e-6, 'm': 1e-3,
+            'k': 1e3, 'meg': 1e6, 'g': 1e9, 't': 1e12}
+VALUE = re.compile(r'([-+]?(?:\d+\.?\d*|\.\d+)(?:e[-+]?\d+)?)'
+                   r'(meg|[fpnumkgt])?', re.IGNORECASE)
+
+
+class NetlistError(Exception):
+    '''The line of the netlist can't be understood.'''
+
+
+def parse_value(text):
+    '''Translates the SPICE value (like 4.7k, 1meg or 10ohm) into float.'''
+    match = VALUE.match(text)
+    if match is None:
+        raise ValueError(text)
+    value = float(match.group(1))
+    if match.group(2):
+        value *= SUFFIXES[match.group(2).lower()]
+    return value
+
+
+def records(file, title=True):
+    '''Yields (name, node_a, node_b, value) for every resistor (R), voltage
+    source (V) and current source (I) in the SPICE-style netlist, one by
+    one, so the file (or any iterable of lines) can be of any size.
+    Nodes are names (str). Comments (*), empty lines and other elements
+    are skipped, and .end finishes the netlist. Continuation lines (+) and
+    subcircuits (.subckt) aren't supported.
+    param title (bool) - if True: the first line is the title (like in
+                         SPICE) and it is skipped'''
+    for line_number, line in enumerate(file, 1):
+        if title and line_number == 1:
+            continue
+        fields = line.split()
+        if not fields or fields[0].startswith('*'):
+            continue
+        kind = fields[0][0].upper()
+        if fields[0].lower() == '.end':
+            return
+        if kind not in ('R', 'V', 'I'):
+            continue
+        try:
+            value = fields[3]
+            if kind != 'R' and value.upper() == 'DC':
+                value = fields[4]
+            yield fields[0], fields[1], fields[2], parse_value(value)
+        except (IndexError, ValueError) as error:
+            raise NetlistError(
+                f'Wrong line {line_number}: {line.strip()}') from error
+
+
+def resistors(items, nodes):
+    '''Yields Resistors (named like in the netlist) for resistors from items
+    made by records. Their nodes are added to nodes (Nodes) by names, so
+    they can be given to nodes.interpret straight away.'''
+    for name, node_a, node_b, value in items:
+        if name[0].upper() != 'R':
+            continue
+        resistor = Resistor(None, name, value)
+        resistor.node_a = nodes.named_node(node_a)
+        resistor.node_b = nodes.named_node(node_b)
+        yield resistor
+
+
+def write(file, elements, names=None, source=None,
+          title='resistorer circuit'):
+    '''Writes elements (Primitives with node_a and node_b, e.g. from
+    Board.calc_res) to the file as the SPICE-style netlist, line by line.
+    param names - the function giving the name of the node by its index
+                  (if None: like N5)
+    param source (tuple) - (start, end, unit, value) of the power supply
+                           written before them (or None)
+    param title (str) - the first line of the netlist'''
+    if names is None:
+        names = 'N{}'.format
+    file.write(f'{title}\n')
+    if source is not None:
+        start, end, unit, value = source
+        kind = 'V' if unit == get_unit('U') else 'I'
+        file.write(f'{kind}1 {names(start)} {names(end)} {value!r}\n')
+    for element in elements:
+        uid = getattr(element, 'uid', None)
+        name = uid if isinstance(uid, str) else f'R{uid}'
+        file.write(f'{name} {names(element.node_a)} {names(element.node_b)} '
+                   f'{element.ph_r!r}\n')
+    file.write('.end\n')
+
+
+def solve(file, start=None, end=None, unit='V', amount=1, nodes=None,
+          title=True):
+    '''Calculates the circuit from the netlist while it is read. If start
+    and end (names of nodes) aren't given, they are taken from the voltage
+    or current source which has to be the first element of the netlist
+    (like write makes it).
+    param nodes (Nodes) - where the circuit is calculated (if None: new one)
+    param title (bool) - if True: the first line is the title (see records)
+    Returns the tuple: (the circuit, nodes).'''
+    if nodes is None:
+        nodes = Nodes()
+    items = records(file, title)
+    if start is None or end is None:
+        first = next(items, None)
+        if first is None or first[0][0].upper() not in ('V', 'I'):
+            raise NetlistError('There is no source at the beginning and '
+                               'start and end aren\'t given.')
+        _, start, end, amount = first
+        unit = get_unit('U' if first[0][0].upper() == 'V' else 'I')
+    start, end = nodes.named_node(start), nodes.named_node(end)
+    circuit = nodes.interpret(resistors(items, nodes), start, end)
+    nodes.calc_voltages(circuit, unit, amount)
+    return circuit, nodes
+
+
+if __name__ == '__main__':
+    with open(sys.argv[1], encoding='utf-8') as netlist_file:
+        CIRCUIT, NODES = solve(netlist_file, *sys.argv[2:4])
+    print(CIRCUIT.ph_r)
+    for leaf in NODES.leaves(CIRCUIT):
+        print(repr(leaf), leaf.ph_r, leaf.ph_u, leaf.ph_i)
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# file from https://github.com/Nircek/resistorer
+# licensed under MIT license
+
+'''
+MIT License
+
+Copyright (c) 2018-2019 Nircek
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+
+from heapq import heappush, heappop
+from math import inf
+
+from primitives import Primitive, Network
+
+MAX_UPDATES = 16  # rank-one updates before the matrix is factorized again
+
+
+class NodalAnalysis:
+    '''The alternative solver of the circuit. Instead of looking for known
+    connections (like Nodes.interpret) it builds the conductance (Laplacian)
+    matrix of the circuit and solves it with the sparse LDL^T factorization
+    (nodes are eliminated in the minimum degree order). It can solve every
+    circuit made from resistors. Nodes connected by 0 ohm elements are
+    merged into one (like nodes connected by wires), because there is no
+    conductance between them.'''
+    def __init__(self, data, start, end):
+        self.data, self.start, self.end = data, start, end
+        self.source = start, end  # before merging
+        self.merged = {}  # node -> the node it is merged into
+        self.rows = {}  # node -> {neighbour: conductance between them}
+        self.diagonal = {}  # node -> the sum of conductances connected to it
+        self.factors = []  # (node, pivot, {neighbour: entry}) in order
+        self.updates = []  # (vector, change, solution, denominator)
+        self.nodes = set()
+        self.potentials = {}
+        self.network = None
+
+    def root(self, node):
+        '''Gets the node which node is merged into.'''
+        while node in self.merged:
+            node = self.merged[node]
+        return node
+
+    def merge(self):
+        '''Merges nodes connected by 0 ohm elements (see root).'''
+        self.merged = {}
+        for ele in self.data:
+            if ele.ph_r == 0:
+                node_a, node_b = self.root(ele.node_a), self.root(ele.node_b)
+                if node_a != node_b:
+                    self.merged[max(node_a, node_b)] = min(node_a, node_b)
+        self.start, self.end = map(self.root, self.source)
+
+    def ends(self, ele):
+        '''Gets (node_a, node_b) of the element after merging.'''
+        return self.root(ele.node_a), self.root(ele.node_b)
+
+    def connected(self):
+        '''Gets the set of nodes connected with self.start.'''
+        neighbours = {}
+        for ele in self.data:
+            node_a, node_b = self.ends(ele)
+            if node_a != node_b and ele.ph_r != inf:
+                neighbours.setdefault(node_a, []).append(node_b)
+                neighbours.setdefault(node_b, []).append(node_a)
+        found = {self.start}
+        stack = [self.start]
+        while stack:
+            for node in neighbours.get(stack.pop(), ()):
+                if node not in found:
+                    found.add(node)
+                    stack.append(node)
+        return found
+
+    def build(self, nodes):
+        '''Builds the conductance matrix of the part of the circuit made from
+        nodes. The self.end node is grounded so its row is skipped.'''
+        self.rows = {node: {} for node in nodes if node != self.end}
+        self.diagonal = dict.fromkeys(self.rows, 0)
+        for ele in self.data:
+            node_a, node_b = self.ends(ele)
+            if node_a == node_b or node_a not in nodes or ele.ph_r == inf:
+                continue
+            conductance = 1 / ele.ph_r
+            for node, other in ((node_a, node_b), (node_b, node_a)):
+                if node != self.end:
+                    self.diagonal[node] += conductance
+                    if other != self.end:
+                        row = self.rows[node]
+                        row[other] = row.get(other, 0) - conductance
+
+    def factorize(self):
+        '''Eliminates all nodes of the matrix (the minimum degree first)
+        and saves the factors in self.factors.'''
+        rows, diagonal = self.rows, self.diagonal
+        queue = []
+        for node, row in rows.items():
+            heappush(queue, (len(row), node))
+        self.factors = []
+        while queue:
+            degree, node = heappop(queue)
+            if node not in rows or degree != len(rows[node]):
+                continue  # outdated entry
+            row = rows.pop(node)
+            pivot = diagonal.pop(node)
+            self.factors.append((node, pivot, row))
+            for neighbour, entry in row.items():
+                neighbour_row = rows[neighbour]
+                del neighbour_row[node]
+                diagonal[neighbour] -= entry * entry / pivot
+                for other, other_entry in row.items():
+                    if other != neighbour:
+                        neighbour_row[other] = neighbour_row.get(other, 0) - \
+                            entry * other_entry / pivot
+                heappush(queue, (len(neighbour_row), neighbour))
+
+    def substitute(self, currents):
+        '''Solves the factorized matrix for currents (dict: node -> current
+        flowing into the node) and returns the dict of potentials.'''
+        currents = dict(currents)
+        for node, pivot, row in self.factors:
+            current = currents.get(node, 0)
+            if current:
+                for neighbour, entry in row.items():
+                    currents[neighbour] = currents.get(neighbour, 0) - \
+                        entry / pivot * current
+        potentials = {self.end: 0}
+        for node, pivot, row in reversed(self.factors):
+            potentials[node] = (currents.get(node, 0) - sum(
+                entry * potentials[neighbour]
+                for neighbour, entry in row.items())) / pivot
+        return potentials
+
+    def solve_updated(self, currents):
+        '''Solves the matrix like substitute but takes into account all
+        changes of resistances made by update.'''
+        potentials = self.substitute(currents)
+        for vector, change, solution, denominator in self.updates:
+            factor = change * sum(value * potentials[node]
+                                  for node, value in vector.items()) \
+                / denominator
+            for node, value in solution.items():
+                potentials[node] -= factor * value
+        return potentials
+
+    def update(self, element, old_r):
+        '''Updates the solution after the change of the resistance of the
+        element (from old_r) without solving the whole circuit again. It uses
+        the rank-one (Sherman-Morrison) update of the factorized matrix.
+        Returns False if it can't be done and solve has to be used.'''
+        node_a, node_b = self.ends(element)
+        if node_a == node_b or \
+                (node_a not in self.nodes and node_b not in self.nodes):
+            return True  # it doesn't change anything
+        if node_a not in self.nodes or node_b not in self.nodes or \
+                self.network is None or len(self.updates) >= MAX_UPDATES or \
+                0 in (old_r, element.ph_r) or inf in (old_r, element.ph_r):
+            return False
+        vector = {node: value for node, value in ((node_a, 1), (node_b, -1))
+                  if node != self.end}
+        change = 1 / element.ph_r - 1 / old_r
+        solution = self.solve_updated(vector)
+        denominator = 1 + change * sum(value * solution[node]
+                                       for node, value in vector.items())
+        if denominator == 0:
+            return False
+        factor = change * sum(value * self.potentials[node]
+                              for node, value in vector.items()) / denominator
+        self.potentials = {node: potential - factor * solution[node]
+                           for node, potential in self.potentials.items()}
+        self.updates += [(vector, change, solution, denominator)]
+        self.network.ph_r = self.potentials[self.start]
+        self.network.potentials = self.all_potentials()
+        self.network.currents = self.short_currents()
+        return True
+
+    def all_potentials(self):
+        '''Gets self.potentials with merged nodes added.'''
+        potentials = dict(self.potentials)
+        for node in self.merged:
+            if self.root(node) in potentials:
+                potentials[node] = potentials[self.root(node)]
+        return potentials
+
+    def short_currents(self):
+        '''Figures currents of 0 ohm elements (when the current of 1 A flows
+        through the network), which can't be figured from potentials. The
+        current flowing into every merged node from other elements (and the
+        source) is carried to the next node by a tree of 0 ohm elements
+        (0 ohm elements making loops get no current).
+        Returns the dict: index of the element in self.data -> current.'''
+        excess = {self.source[0]: 1}  # node -> current flowing into it
+        excess[self.source[1]] = excess.get(self.source[1], 0) - 1
+        shorts = {}  # node -> [(index, other node)] of 0 ohm elements
+        for index, ele in enumerate(self.data):
+            node_a, node_b = self.ends(ele)
+            if ele.node_a == ele.node_b or node_a not in self.nodes:
+                continue
+            if ele.ph_r == 0:
+                shorts.setdefault(ele.node_a, []).append((index, ele.node_b))
+                shorts.setdefault(ele.node_b, []).append((index, ele.node_a))
+            elif ele.ph_r != inf and node_a != node_b:
+                current = (self.potentials[node_a]
+                           - self.potentials[node_b]) / ele.ph_r
+                excess[ele.node_a] = excess.get(ele.node_a, 0) - current
+                excess[ele.node_b] = excess.get(ele.node_b, 0) + current
+        currents, found = {}, set()
+        for first in shorts:
+            if first in found:
+                continue
+            order = [(first, None, None)]
+            found.add(first)
+            for node, _, _ in order:  # the tree (BFS) of the merged node
+                for index, other in shorts[node]:
+                    if other not in found:
+                        found.add(other)
+                        order += [(other, node, index)]
+            for node, parent, index in reversed(order[1:]):
+                currents[index] = abs(excess.get(node, 0))
+                excess[parent] = excess.get(parent, 0) + excess.get(node, 0)
+        return currents
+
+    def solve(self):
+        '''Calculates the circuit and returns it as the Network (or Primitive
+        if there is no connection between start and end).'''
+        self.merge()
+        if self.start == self.end:
+            return Primitive(0)
+        nodes = self.connected()
+        if self.end not in nodes:
+            return Primitive(inf)
+        self.nodes = nodes
+        self.build(nodes)
+        self.factorize()
+        self.updates = []
+        self.potentials = self.substitute({self.start: 1})
+        self.network = Network(self.data, self.potentials[self.start],
+                               self.all_potentials(), self.short_currents())
+        self.network.node_a, self.network.node_b = self.source
+        return self.network
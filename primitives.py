@@ -38,18 +38,75 @@ def get_unit(what):
     return ''
 
 
+def slot_names(obj):
+    '''Gets names of all __slots__ of the classes of obj.'''
+    return [name for cls in type(obj).__mro__
+            for name in cls.__dict__.get('__slots__', ())]
+
+
+def merge_state(state):
+    '''Makes one dict from the state of the pickled object, which is a dict
+    (pickled before __slots__) or a tuple (dict, slots).'''
+    if isinstance(state, tuple):
+        return {**(state[0] or {}), **(state[1] or {})}
+    return dict(state)
+
+
+def restore_state(obj, state):
+    '''Sets attributes of obj from the state (dict). Attributes which aren't
+    in __slots__ any more are skipped.'''
+    names = set(slot_names(obj))
+    for name, value in state.items():
+        if name in names:
+            setattr(obj, name, value)
+
+
 class Primitive:
     '''The base class for all things that have resistance and there can be
     connected some voltage or current to it.'''
+    __slots__ = ('_ph_r', '_ph_i', '_ph_u', 'node_a', 'node_b', 'data',
+                 'parents')
+    symbol = None  # the symbol of the container used in repr
+
     def __init__(self, r=None):
-        if r is not None:
-            self.ph_r = r
+        self._ph_r = r  # None if it has to be calculated (see calc_r)
         self._ph_i, self._ph_u = None, None
         self.node_a, self.node_b = None, None
-        self.data = []
+        self.data = ()
+        self.parents = []  # containers which have self as a component
 
     def __repr__(self):
-        return '[' + str(self.ph_r) + ']'
+        if self.symbol is None:
+            return '[' + str(self.ph_r) + ']'
+        texts, stack = [], [self]  # iterative, so deep circuits can be shown
+        while stack:
+            part = stack.pop()
+            if isinstance(part, str):
+                texts += [part]
+            elif not isinstance(part, Primitive) or part.symbol is None:
+                texts += [repr(part)]
+            else:
+                texts += [part.symbol + '(']
+                stack += [')']
+                items = list(part.components) + part.extra_info()
+                for i in reversed(range(len(items))):
+                    stack += [items[i]] if i == 0 else [items[i], ', ']
+        return ''.join(texts)
+
+    def extra_info(self):
+        '''Gets the list of things shown in repr after components.'''
+        return []
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in slot_names(self)
+                if hasattr(self, name)}
+
+    def __setstate__(self, state):
+        state = merge_state(state)
+        if 'ph_r' in state:  # pickled before ph_r became remembered
+            state['_ph_r'] = state.pop('ph_r')
+        state.setdefault('parents', [])
+        restore_state(self, state)
 
     def __str__(self):
         return self.__class__.__name__
@@ -59,6 +116,55 @@ class Primitive:
         '''The variable containing all dependent components.'''
         return self.data
 
+    @property
+    def ph_r(self):
+        '''The value of resistance (in ohms). It is calculated only once and
+        remembered until some resistance in components changes.'''
+        if self._ph_r is None:
+            self.refresh_r()
+        return self._ph_r
+
+    @ph_r.setter
+    def ph_r(self, new):
+        self._ph_r = new
+        self.invalidate()
+
+    def calc_r(self):
+        '''Calculates the resistance from components.'''
+        raise AttributeError(f'{self} has no resistance')
+
+    def refresh_r(self):
+        '''Calculates the forgotten resistances of self and its components.
+        It is iterative (the deepest components are calculated first), so it
+        works for very deep circuits.'''
+        stack = [(self, False)]
+        while stack:
+            part, ready = stack.pop()
+            if part._ph_r is not None:
+                continue
+            if ready:
+                part._ph_r = part.calc_r()
+            else:
+                stack += [(part, True)]
+                stack += [(x, False) for x in part.components
+                          if x._ph_r is None]
+
+    def link_components(self):
+        '''Adds self to parents of all components, so they can invalidate
+        the remembered resistance of self.'''
+        for component in self.components:
+            component.parents += [self]
+
+    def invalidate(self):
+        '''Forgets the remembered resistances of all containers containing
+        self (directly or not).'''
+        stack = list(self.parents)
+        while stack:
+            part = stack.pop()
+            if part._ph_r is not None:  # else parents are invalidated too
+                part._ph_r = None
+                stack += part.parents
+
     @property
     def ph_i(self):
         '''The value of current (in amperes) that flows through.'''
@@ -70,7 +176,17 @@ class Primitive:
         return self._ph_u
 
     def update_r(self):
-        '''Updates some info about subcomponents.'''
+        '''Updates current and voltage of all components (and of their
+        components). It is one iterative pass using remembered resistances,
+        so it works for very deep circuits.'''
+        stack = [self]
+        while stack:
+            stack += stack.pop().spread()
+
+    def spread(self):
+        '''Sets current and voltage of the direct components from these of
+        self. Returns components which have to spread them further.'''
+        return []
 
     def clear_iu(self):
         '''Clears current and voltage assigned.'''
@@ -99,43 +215,47 @@ class Primitive:
 class Series(Primitive):
     '''The container for Primitives that simulates the components are connected
     in series.'''
+    __slots__ = ()
+    symbol = '+'
+
     def __init__(self, *args):
         super().__init__()
         self.data = args
+        self.link_components()
         self.ph_u = None
 
-    def __repr__(self):
-        return '+(' + ', '.join(map(repr, self.data)) + ')'
-
-    @property
-    def ph_r(self):
+    def calc_r(self):
         '''The total resistance of the series circuit.'''
         return sum(map(lambda x: x.ph_r, self.data))
 
-    def update_r(self):
+    def spread(self):
         for ele in self.data:
-            ele.ph_i = self.ph_i
+            ele._ph_i = self._ph_i
+            ele._ph_u = ele.ph_r * self._ph_i
+        return self.data
 
 
 class Parallel(Primitive):
     '''The container for Primitives that simulates the components are connected
     in parallel.'''
+    __slots__ = ()
+    symbol = ':'
+
     def __init__(self, *args):
         super().__init__()
         self.data = args
+        self.link_components()
         self.ph_u = None
 
-    def __repr__(self):
-        return ':(' + ', '.join(map(repr, self.data)) + ')'
-
-    @property
-    def ph_r(self):
+    def calc_r(self):
         '''The total resistance of the parallel circuit.'''
         return 1 / sum(map(lambda x: 1 / x.ph_r, self.data))
 
-    def update_r(self):
+    def spread(self):
         for ele in self.data:
-            ele.ph_u = self.ph_u
+            ele._ph_u = self._ph_u
+            ele._ph_i = self._ph_u / ele.ph_r
+        return self.data
 
 
 class Delta(Primitive):
@@ -147,27 +267,31 @@ class Delta(Primitive):
     [(0, {1}, 1), (1, {2}, 2), (1, {3}, 3), (0, {4}, 3), (3, {5}, 2)]
     and voltage is connected between 0. and 2. node of this circuit,
     the simplified circuit representation is:
-    +(Δ({1}, {3}, {4}, 1),
-    :(+({2}, Δ({1}, {3}, {4}, 3)), +({5}, Δ({1}, {3}, {4}, 2))))
+    +(Δ({1}, {4}, {3}, 1),
+    :(+({5}, Δ({1}, {4}, {3}, 3)), +({2}, Δ({1}, {4}, {3}, 2))))
     because a delta connection was translated into:
-    [(2, {2}, 1), (3, {5}, 1),
-    (0, Δ({1}, {3}, {4}, 1), 4),
-    (3, Δ({1}, {3}, {4}, 2), 4),
-    (2, Δ({1}, {3}, {4}, 3), 4)]
+    [(1, {2}, 2), (3, {5}, 2),
+    (0, Δ({1}, {4}, {3}, 1), 4),
+    (1, Δ({1}, {4}, {3}, 2), 4),
+    (3, Δ({1}, {4}, {3}, 3), 4)]
+    (the wiring_type is connected to the node shared by the components
+    multiplied in ph_r)
     more info: https://en.wikipedia.org/wiki/Y-%CE%94_transform
     '''
+    __slots__ = ('wiring_type',)
+    symbol = '\N{GREEK CAPITAL LETTER DELTA}'
+
     def __init__(self, x, y, z, i):
         super().__init__()
         self.data = [x, y, z]
         self.wiring_type = i
+        self.link_components()
         self.ph_u = None
 
-    def __repr__(self):
-        return '\N{GREEK CAPITAL LETTER DELTA}(' + \
-               ', '.join(map(repr, self.components + [self.wiring_type])) + ')'
+    def extra_info(self):
+        return [self.wiring_type]
 
-    @property
-    def ph_r(self):
+    def calc_r(self):
         '''The resistance of the corresponding resistor (with a wiring_type)
         in the delta circuit.'''
         return {
@@ -175,3 +299,85 @@ class Delta(Primitive):
             2: self.components[0].ph_r * self.components[2].ph_r,
             3: self.components[1].ph_r * self.components[2].ph_r
         }[self.wiring_type] / sum(map(lambda x: x.ph_r, self.components))
+
+
+class Network(Primitive):
+    '''The container for Primitives connected in any way. It is the result of
+    NodalAnalysis: potentials (dict) are potentials of nodes (relative to
+    node_b) when the current of 1 A flows through the whole network.
+    Currents of 0 ohm elements can't be figured from potentials, so they are
+    in currents (dict: index in data -> current for 1 A).'''
+    __slots__ = ('potentials', 'currents')
+    symbol = '#'
+
+    def __init__(self, data, r, potentials, currents=None):
+        super().__init__(r)
+        self.data = data
+        self.potentials = potentials
+        self.currents = {} if currents is None else currents
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        if not hasattr(self, 'currents'):  # pickled before currents
+            self.currents = {}
+
+    def spread(self):
+        for index, ele in enumerate(self.data):
+            if ele.node_a in self.potentials and \
+                    ele.node_b in self.potentials:
+                ele._ph_u = abs(self.potentials[ele.node_a]
+                                - self.potentials[ele.node_b]) * self._ph_i
+                ele._ph_i = ele._ph_u / ele.ph_r if ele.ph_r else \
+                    self.currents.get(index, 0) * self._ph_i
+        return self.data
+
+
+class Star(Primitive):
+    '''The container for Primitives which are connected in star (all of them
+    are connected to one node which is eliminated). It is shared by all Mesh
+    containers made from the star, so its resistance (the resistance of the
+    components connected in parallel, 1 / the total conductance) is
+    remembered once for all of them. Both of its nodes are the eliminated
+    node.'''
+    __slots__ = ()
+    symbol = 'Y'
+
+    def __init__(self, *args):
+        super().__init__()
+        self.data = args
+        self.link_components()
+        self.ph_u = None
+
+    def calc_r(self):
+        '''The resistance of the components connected in parallel.'''
+        return 1 / sum(map(lambda x: 1 / x.ph_r, self.data))
+
+
+class Mesh(Primitive):
+    '''The container for Primitives that simulates the components which are
+    connected in star (see Star). Such connection can be translated into the
+    mesh made from Mesh containers connecting every pair of the other sides
+    of the components (first and second are indexes of this pair in
+    components of the Star, which is the only component of Mesh).
+    For 3 components it is the reverse of the Delta transformation.
+    more info: https://en.wikipedia.org/wiki/Star-mesh_transform
+    '''
+    __slots__ = ('first', 'second')
+    symbol = '*'
+
+    def __init__(self, star, first, second):
+        super().__init__()
+        self.data = (star,)
+        self.first, self.second = first, second
+        self.link_components()
+        self.ph_u = None
+
+    def extra_info(self):
+        return [self.first, self.second]
+
+    def calc_r(self):
+        '''The resistance of the connection between the other sides of
+        the first and the second component.'''
+        star = self.data[0]
+        return star.components[self.first].ph_r * \
+            star.components[self.second].ph_r / star.ph_r
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# file from https://github.com/Nircek/resistorer
+# licensed under MIT license
+
+'''
+MIT License
+
+Copyright (c) 2018-2019 Nircek
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import pickle
+import sys
+
+from board import Board
+from elements import Resistor
+
+MAGIC = 'resistorer-sketch'
+VERSION = 1
+PINS = {'APin': 'A', 'BPin': 'B'}
+
+
+class SketchFormatError(Exception):
+    '''The file is not a sketch in the known format.'''
+
+
+def number(text):
+    '''Translates text into int or (if it isn't integer) float.'''
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def write(file, board, unit='V', amount=12):
+    '''Writes the board and the power supply to the file (opened in
+    text mode) line by line.'''
+    file.write(f'{MAGIC} {VERSION}\n')
+    file.write(f'P {unit} {amount!r}\n')
+    for (x_coord, y_coord, orient), tel in board.tels.items():
+        if str(tel) == 'Resistor':
+            file.write(f'R {x_coord} {y_coord} {orient} {tel.ph_r!r} '
+                       f'{tel.uid}\n')
+        elif str(tel) == 'Wire':
+            file.write(f'W {x_coord} {y_coord} {orient}\n')
+    for (x_coord, y_coord), oel in board.oels.items():
+        if str(oel) in PINS:
+            file.write(f'{PINS[str(oel)]} {x_coord} {y_coord}\n')
+
+
+def records(file):
+    '''Yields (kind, position, value, uid) for every line of the file
+    (opened in text mode), where kind is the first letter of the line.
+    value is the resistance of R or the value of the power supply of P
+    (uid is its unit then). The file has one Element in each line (after
+    the header with the version):
+
+        resistorer-sketch 1
+        P V 12              the power supply: unit and value
+        R 0 0 0 2.5 1       Resistor: x, y, orient, resistance and uid
+        W 1 0 1             Wire: x, y, orient
+        A 0 0               APin: x, y
+        B 2 0               BPin: x, y
+
+    Empty lines and lines starting with # are skipped.'''
+    header = file.readline().split()
+    if len(header) != 2 or header[0] != MAGIC:
+        raise SketchFormatError('It is not a sketch file.')
+    try:
+        version = number(header[1])
+    except ValueError as error:
+        raise SketchFormatError(f'Wrong version {header[1]}.') from error
+    if version > VERSION:
+        raise SketchFormatError(f'Not known version {header[1]}.')
+    for line_number, line in enumerate(file, 2):
+        fields = line.split()
+        if not fields or fields[0].startswith('#'):
+            continue
+        try:
+            kind = fields[0]
+            if kind == 'P':
+                yield kind, None, number(fields[2]), fields[1]
+            elif kind == 'R':
+                yield kind, tuple(map(int, fields[1:4])), \
+                    number(fields[4]), int(fields[5])
+            elif kind == 'W':
+                yield kind, tuple(map(int, fields[1:4])), None, None
+            elif kind in ('A', 'B'):
+                yield kind, tuple(map(int, fields[1:3])), None, None
+            else:
+                raise ValueError(kind)
+        except (IndexError, ValueError) as error:
+            raise SketchFormatError(
+                f'Wrong line {line_number}: {line.strip()}') from error
+
+
+def load(file, board, parent=None):
+    '''Adds all Elements from the file (opened in text mode) to the board.
+    param parent - the BoardEditor displaying them (or None)
+    Returns the power supply: (unit, value).'''
+    power, top = ('V', 12), 0
+    for kind, pos, value, uid in records(file):
+        if kind == 'P':
+            power = uid, value
+        elif kind == 'R':
+            board.add_resistor(pos, value, uid, parent)
+            top = max(top, uid)
+        elif kind == 'W':
+            board.add_wire(pos, parent)
+        elif kind == 'A':
+            board.add_pins(pos, None, parent)
+        else:
+            board.add_pins(None, pos, parent)
+    Resistor.resistor_i = max(Resistor.resistor_i, top + 1)
+    return power
+
+
+def is_sketch(path):
+    '''Checks if the file at path is in this format.'''
+    with open(path, mode='rb') as file:
+        return file.read(len(MAGIC)) == MAGIC.encode()
+
+
+def load_legacy(path):
+    '''Reads the sketch pickled by the old BoardEditor.dump. Pickles can run
+    any code, so it can be used only for trusted files.
+    Returns (board, unit, value).'''
+    with open(path, mode='rb') as file:
+        editor = pickle.load(file)
+    return editor.board, 'V' if editor.powerv else 'A', editor.power
+
+
+def open_sketch(path, legacy=False):
+    '''Reads the sketch file into a new Board. If legacy, old pickled
+    sketches are read too.
+    Returns (board, unit, value).'''
+    if not is_sketch(path):
+        if legacy:
+            return load_legacy(path)
+        raise SketchFormatError('It is not a sketch file (old ones can be '
+                                'converted by sketch.py).')
+    board = Board()
+    with open(path, encoding='utf-8') as file:
+        unit, value = load(file, board)
+    return board, unit, value
+
+
+def convert(source, target=None):
+    '''Rewrites the old pickled sketch in this format.
+    param target - the path of the new file (if None: source is replaced)
+    Returns False if source is in this format already.'''
+    if is_sketch(source):
+        return False
+    board, unit, value = load_legacy(source)
+    with open(source if target is None else target, mode='w',
+              encoding='utf-8') as file:
+        write(file, board, unit, value)
+    return True
+
+
+if __name__ == '__main__':
+    FAILED = False
+    for argument in sys.argv[1:]:
+        try:
+            if convert(argument):
+                print('converted', argument)
+        except Exception as error:  # pylint: disable=W0703
+            print(f'{argument}: {error.__class__.__name__}: {error}',
+                  file=sys.stderr)
+            FAILED = True
+    sys.exit(1 if FAILED else 0)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# file from https://github.com/Nircek/resistorer
+# licensed under MIT license
+
+'''
+MIT License
+
+Copyright (c) 2018-2019 Nircek
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+from array import array
+from collections.abc import MutableMapping
+
+WIRE, OBJECT = 0, 1  # kinds of rows
+EMPTY = -1  # the empty slot of the index
+FIBONACCI = 0x9E3779B97F4A7C15  # 2^64 / golden ratio, spreads keys
+
+
+def pack(pos):
+    '''Packs the position (x, y, orient) of TElement into one int.'''
+    x_coord, y_coord, orient = pos
+    return ((x_coord << 32) + y_coord + (1 << 31)) * 4 + orient + 1
+
+
+class ElementStore(MutableMapping):
+    '''The compact replacement of the dict used as Board.tels (positions
+    (x, y, orient) -> TElements). Positions and kinds of elements are kept
+    in arrays (one row for each element) and rows are found by the hash
+    index made from arrays too (open addressing), so there is no Python
+    object for each element. Wires have no own data, so they are kept only
+    there and the same Wire (flyweight) is given for all of them. Other
+    elements (e.g. Resistors, which are Primitives changed by calculations)
+    are kept as objects.'''
+    def __init__(self):
+        self.x_coords, self.y_coords = array('i'), array('i')
+        self.orients, self.kinds = array('b'), array('b')
+        self.objects = {}  # row -> element (for OBJECT rows)
+        self.wire = None  # the flyweight Wire
+        self.slots = array('i', [EMPTY]) * 8  # slot -> row
+        self.packed = array('q', [0]) * 8  # slot -> packed position
+
+    def home(self, key):
+        '''Gets the first slot of the index where the key can be.'''
+        return (key * FIBONACCI >> 32) & (len(self.slots) - 1)
+
+    def find(self, key):
+        '''Gets the slot of the index with the key or the empty slot
+        where it should be put.'''
+        mask = len(self.slots) - 1
+        slot = self.home(key)
+        while self.slots[slot] != EMPTY and self.packed[slot] != key:
+            slot = (slot + 1) & mask
+        return slot
+
+    def grow(self):
+        '''Makes the index two times bigger and puts all rows into it.'''
+        size = len(self.slots) * 2
+        self.slots = array('i', [EMPTY]) * size
+        self.packed = array('q', [0]) * size
+        for row, pos in enumerate(self):
+            key = pack(pos)
+            slot = self.find(key)
+            self.slots[slot], self.packed[slot] = row, key
+
+    def release(self, slot):
+        '''Empties the slot of the index and moves back the following keys
+        which would not be found otherwise.'''
+        mask = len(self.slots) - 1
+        self.slots[slot] = EMPTY
+        following = (slot + 1) & mask
+        while self.slots[following] != EMPTY:
+            key = self.packed[following]
+            if (following - self.home(key)) & mask >= \
+                    (following - slot) & mask:
+                self.slots[slot] = self.slots[following]
+                self.packed[slot] = key
+                self.slots[following] = EMPTY
+                slot = following
+            following = (following + 1) & mask
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __iter__(self):
+        for row in range(len(self.kinds)):
+            yield self.x_coords[row], self.y_coords[row], self.orients[row]
+
+    def __contains__(self, pos):
+        try:
+            return self.slots[self.find(pack(pos))] != EMPTY
+        except (TypeError, ValueError, OverflowError):
+            return False
+
+    def __getitem__(self, pos):
+        row = self.slots[self.find(pack(pos))]
+        if row == EMPTY:
+            raise KeyError(pos)
+        if self.kinds[row] == WIRE:
+            return self.wire
+        return self.objects[row]
+
+    def __setitem__(self, pos, element):
+        key = pack(pos)
+        slot = self.find(key)
+        row = self.slots[slot]
+        if row == EMPTY:
+            row = len(self.kinds)
+            self.slots[slot], self.packed[slot] = row, key
+            self.x_coords.append(pos[0])
+            self.y_coords.append(pos[1])
+            self.orients.append(pos[2])
+            self.kinds.append(WIRE)
+            if len(self.kinds) * 2 > len(self.slots):
+                self.grow()
+        if str(element) == 'Wire':
+            if self.wire is None:
+                self.wire = element
+            self.kinds[row] = WIRE
+            self.objects.pop(row, None)
+        else:
+            self.kinds[row] = OBJECT
+            self.objects[row] = element
+
+    def __delitem__(self, pos):
+        slot = self.find(pack(pos))
+        row = self.slots[slot]
+        if row == EMPTY:
+            raise KeyError(pos)
+        self.release(slot)
+        last = len(self.kinds) - 1
+        if row != last:  # the last row fills the hole
+            self.x_coords[row] = self.x_coords[last]
+            self.y_coords[row] = self.y_coords[last]
+            self.orients[row] = self.orients[last]
+            self.kinds[row] = self.kinds[last]
+            self.slots[self.find(pack((self.x_coords[row], self.y_coords[row],
+                                       self.orients[row])))] = row
+            if last in self.objects:
+                self.objects[row] = self.objects.pop(last)
+            else:
+                self.objects.pop(row, None)
+        else:
+            self.objects.pop(row, None)
+        for column in (self.x_coords, self.y_coords, self.orients,
+                       self.kinds):
+            column.pop()
+
+    def clear(self):
+        self.__init__()
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class Tiles:
+    '''The spatial index of Elements: (kind, pos) of every Element is kept
+    in the square tile (SIZE x SIZE places) containing pos, so Elements
+    in a rectangle are found by looking only at tiles it covers.
+    kind is 't' (TElement, pos is (x, y, orient)) or 'o' (OElement, pos is
+    (x, y)).'''
+    SIZE = 16
+
+    def __init__(self):
+        self.tiles = {}  # (x, y) of the tile -> set of (kind, pos)
+
+    def add(self, kind, pos):
+        '''Adds the Element at pos.'''
+        tile = pos[0] // self.SIZE, pos[1] // self.SIZE
+        self.tiles.setdefault(tile, set()).add((kind, pos))
+
+    def discard(self, kind, pos):
+        '''Removes the Element at pos if it is present.'''
+        tile = pos[0] // self.SIZE, pos[1] // self.SIZE
+        if tile in self.tiles:
+            self.tiles[tile].discard((kind, pos))
+            if not self.tiles[tile]:
+                del self.tiles[tile]
+
+    def find(self, x_min, y_min, x_max, y_max):
+        '''Yields (kind, pos) of Elements with x_min <= x <= x_max and
+        y_min <= y <= y_max.'''
+        columns = range(x_min // self.SIZE, x_max // self.SIZE + 1)
+        rows = range(y_min // self.SIZE, y_max // self.SIZE + 1)
+        if len(columns) * len(rows) > len(self.tiles):  # look at all tiles
+            tiles = [self.tiles[tile] for tile in self.tiles
+                     if tile[0] in columns and tile[1] in rows]
+        else:
+            tiles = [self.tiles.get((tile_x, tile_y), ())
+                     for tile_x in columns for tile_y in rows]
+        for tile in tiles:
+            for kind, pos in tile:
+                if x_min <= pos[0] <= x_max and y_min <= pos[1] <= y_max:
+                    yield kind, pos
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# file from https://github.com/Nircek/resistorer
+# licensed under MIT license
+
+'''
+MIT License
+
+Copyright (c) 2018-2019 Nircek
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+
+import math
+from operator import mul
+from random import Random
+from statistics import fmean, pstdev
+
+try:
+    import numpy
+except ImportError:  # it works without NumPy too, but sample by sample
+    numpy = None
+
+from primitives import get_unit
+
+COMPOSITES = ('Series', 'Parallel', 'Delta', 'Star', 'Mesh')
+
+
+def anywhere(condition):
+    '''Checks if the condition (bool or NumPy array of bools) is true for
+    any sample.'''
+    return bool(numpy.any(condition)) if numpy is not None else condition
+
+
+def select(condition, true, false):
+    '''Gets true where the condition is true and false elsewhere (works for
+    floats and for NumPy arrays of samples).'''
+    if numpy is not None:
+        return numpy.where(condition, true, false)
+    return true if condition else false
+
+
+def divide(numerator, denominator, default):
+    '''Gets numerator / denominator or default where denominator is 0 (works
+    for floats and for NumPy arrays of samples).'''
+    if numpy is not None:
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            return numpy.where(denominator != 0, numpy.true_divide(
+                numerator, denominator), default)
+    return numerator / denominator if denominator != 0 else default
+
+
+class Tolerance:
+    '''The tolerance (Monte Carlo) analysis of the circuit. The circuit is
+    simplified (by Nodes.interpret) only once and then it is evaluated for
+    many sets of resistances at once. If NumPy is installed, all samples are
+    calculated together as arrays.'''
+    def __init__(self, circuit, resistors, eliminated):
+        '''param circuit - the circuit made from Primitives
+        param resistors (list) - Primitives (leaves of the circuit) which
+                                 resistances are changed
+        param eliminated (list) - Nodes.eliminated made with the circuit'''
+        self.circuit = circuit
+        self.resistors = list(resistors)
+        self.eliminated = list(eliminated)
+        self.program = []  # (kind, arguments, extra info) for every part
+        self.registers = {}  # id of the part -> index in self.program
+        self.containers = {}  # id of the part -> the first part containing it
+        self.compile()
+
+    def operation(self, part, columns):
+        '''Translates the part of the circuit into an operation of
+        self.program.'''
+        if id(part) in columns:
+            return 'leaf', columns[id(part)], None
+        kind = str(part)
+        if kind not in COMPOSITES:
+            return 'const', part.ph_r, None
+        arguments = [self.registers[id(x)] for x in part.components]
+        if kind == 'Delta':
+            return kind, arguments, part.wiring_type
+        if kind == 'Mesh':  # the Star and the pair of its components
+            star = part.components[0]
+            return kind, arguments + [
+                self.registers[id(star.components[part.first])],
+                self.registers[id(star.components[part.second])]], None
+        return kind, arguments, None
+
+    def compile(self):
+        '''Makes self.program from the circuit (and components of eliminated
+        nodes). Every part is saved once, after all of its components.'''
+        columns = {id(x): i for i, x in enumerate(self.resistors)}
+        roots = [self.circuit] + [x for _, components in self.eliminated
+                                  for x in components]
+        for root in roots:
+            stack = [(root, False)]
+            while stack:
+                part, ready = stack.pop()
+                if id(part) in self.registers:
+                    continue
+                if ready or id(part) in columns or \
+                        str(part) not in COMPOSITES:
+                    self.registers[id(part)] = len(self.program)
+                    self.program += [self.operation(part, columns)]
+                else:
+                    stack += [(part, True)]
+                    stack += [(x, False) for x in part.components]
+                    for component in part.components:
+                        self.containers.setdefault(id(component), part)
+
+    def resistances(self, columns):
+        '''Calculates resistances of all parts of self.program.
+        param columns (list) - resistances of self.resistors (floats or
+                               NumPy arrays of samples)'''
+        values = []
+        for kind, arguments, extra in self.program:
+            if kind == 'leaf':
+                value = columns[arguments]
+            elif kind == 'const':
+                value = arguments
+            else:
+                parts = [values[i] for i in arguments]
+                if kind == 'Series':
+                    value = sum(parts)
+                elif kind in ('Parallel', 'Star'):
+                    value = 1 / sum(1 / x for x in parts)
+                elif kind == 'Delta':
+                    value = {
+                        1: parts[0] * parts[1],
+                        2: parts[0] * parts[2],
+                        3: parts[1] * parts[2]
+                    }[extra] / sum(parts)
+                else:
+                    value = parts[1] * parts[2] / parts[0]
+            values += [value]
+        return values
+
+    def evaluate(self, columns, unit, amount):
+        '''Calculates the circuit for the resistances in columns and returns
+        the tuple: (R, voltage drops of self.resistors, currents of them).
+        param unit ('A' or 'V') - the unit of power
+        param amount (int or float) - the value of power'''
+        values = self.resistances(columns)
+        r_eq = values[self.registers[id(self.circuit)]]
+        if unit == get_unit('U'):
+            voltage = amount
+        elif unit == get_unit('I'):
+            voltage = amount * r_eq
+        else:
+            raise RuntimeError(f'Not known unit "{unit}"" to calc.')
+        potentials = {}
+        if self.circuit.node_a is not None:
+            potentials[self.circuit.node_a] = voltage
+            potentials[self.circuit.node_b] = 0 * voltage
+        for node, components in reversed(self.eliminated):
+            others = [potentials.get(x.node_a + x.node_b - node)
+                      for x in components]
+            if any(x is None for x in others):
+                continue  # the node isn't connected with the power supply
+            if len(components) == 1:
+                potentials[node] = others[0]
+                continue
+            resistances = [values[self.registers[id(x)]] for x in components]
+            conductances = [divide(1, x, 0 * x) for x in resistances]
+            potential = divide(sum(map(mul, conductances, others)),
+                               sum(conductances), others[0])
+            for resistance, other in reversed(list(zip(resistances,
+                                                       others))):
+                # the node has the voltage of the other side of 0 ohm
+                potential = select(resistance == 0, other, potential)
+            potentials[node] = potential
+        voltages, currents = [], []
+        for resistor, resistance in zip(self.resistors, columns):
+            voltages += [self.drop(resistor, potentials, resistance)]
+            currents += [self.current(resistor, voltages[-1], values,
+                                      potentials)]
+        return r_eq, voltages, currents
+
+    @staticmethod
+    def drop(part, potentials, like):
+        '''Gets the voltage drop on the part (0 if it isn't connected with
+        the power supply) shaped like the value like.'''
+        if part.node_a in potentials and part.node_b in potentials:
+            return abs(potentials[part.node_a] - potentials[part.node_b])
+        return 0 * like
+
+    def current(self, part, voltage, values, potentials):
+        '''Gets the current of the part from the voltage drop on it. The
+        current of 0 ohm part is taken from the Series containing it (like
+        Nodes.assign_voltages does) or it is nan if it can't be figured.'''
+        resistance = values[self.registers[id(part)]]
+        if not anywhere(resistance == 0):
+            return voltage / resistance
+        container = self.containers.get(id(part))
+        if str(container) == 'Series':
+            fallback = self.current(container, self.drop(
+                container, potentials, voltage), values, potentials)
+        else:
+            fallback = math.nan * voltage
+        return divide(voltage, resistance, fallback)
+
+    def analyse(self, values, unit='V', amount=1, percentiles=(5, 50, 95)):
+        '''Calculates the circuit for every sample of resistances and returns
+        the summary (see Tolerance.summary) of R and of voltage drops ('U')
+        and currents ('I') of every resistor (in order of self.resistors).
+        param values - the matrix (list of lists or NumPy array) with one
+                       sample of resistances of self.resistors in each row
+        param unit ('A' or 'V') - the unit of power
+        param amount (int or float) - the value of power
+        param percentiles (tuple) - percentiles put into the summary'''
+        if numpy is not None:
+            matrix = numpy.asarray(values, dtype=float)
+            r_eq, voltages, currents = self.evaluate(
+                list(matrix.T), unit, amount)
+
+            def summary(samples):
+                return self.summary(numpy.broadcast_to(
+                    samples, (len(matrix),)), percentiles)
+        else:
+            results = [self.evaluate(list(row), unit, amount)
+                       for row in values]
+            r_eq = [x[0] for x in results]
+            voltages = [[x[1][i] for x in results]
+                        for i in range(len(self.resistors))]
+            currents = [[x[2][i] for x in results]
+                        for i in range(len(self.resistors))]
+
+            def summary(samples):
+                return self.summary(samples, percentiles)
+        return {'R': summary(r_eq),
+                'U': [summary(x) for x in voltages],
+                'I': [summary(x) for x in currents]}
+
+    @staticmethod
+    def summary(samples, percentiles):
+        '''Gets the dict with mean, std, min, max and percentiles (dict:
+        percentile -> value) of samples. If there are infinite samples (e.g.
+        R of the open circuit), std is nan and the rest is inf (or nan if it
+        can't be figured), the same with and without NumPy.'''
+        if numpy is not None and numpy.isfinite(samples).all():
+            return {'mean': float(numpy.mean(samples)),
+                    'std': float(numpy.std(samples)),
+                    'min': float(numpy.min(samples)),
+                    'max': float(numpy.max(samples)),
+                    'percentiles': dict(zip(percentiles, map(
+                        float, numpy.percentile(samples, percentiles))))}
+        ordered = sorted(map(float, samples))
+        if any(map(math.isnan, ordered)):
+            return {'mean': math.nan, 'std': math.nan, 'min': math.nan,
+                    'max': math.nan,
+                    'percentiles': dict.fromkeys(percentiles, math.nan)}
+        found = {}
+        for percentile in percentiles:  # linear, like numpy.percentile
+            position = (len(ordered) - 1) * percentile / 100
+            low = int(position)
+            high = min(low + 1, len(ordered) - 1)
+            if position == low or ordered[low] == ordered[high]:  # also inf
+                found[percentile] = ordered[low]
+            else:
+                found[percentile] = ordered[low] + \
+                    (ordered[high] - ordered[low]) * (position - low)
+        if not all(map(math.isfinite, ordered)):  # fmean raises for inf-inf
+            return {'mean': sum(ordered) / len(ordered), 'std': math.nan,
+                    'min': ordered[0], 'max': ordered[-1],
+                    'percentiles': found}
+        return {'mean': fmean(ordered), 'std': pstdev(ordered),
+                'min': ordered[0], 'max': ordered[-1],
+                'percentiles': found}
+
+    def sample(self, count, tolerance=0.05, seed=None):
+        '''Makes the matrix of count samples of resistances of
+        self.resistors, each one uniformly distributed in the range of
+        the nominal resistance +- tolerance (0.05 is 5%).'''
+        nominal = [x.ph_r for x in self.resistors]
+        if numpy is not None:
+            generator = numpy.random.default_rng(seed)
+            return numpy.asarray(nominal) * (1 + generator.uniform(
+                -tolerance, tolerance, (count, len(nominal))))
+        generator = Random(seed)
+        return [[x * (1 + generator.uniform(-tolerance, tolerance))
+                 for x in nominal] for _ in range(count)]